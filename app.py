@@ -5,16 +5,38 @@ Automates posting across multiple Instagram business accounts
 
 import os
 import json
+import hashlib
+import logging
+import mimetypes
 import random
+import re
+import secrets
 import requests
+import socket
+import ssl
 import time
-from datetime import datetime, timedelta
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from datetime import datetime, timedelta, time as dtime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, g
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
+import sqlite3
+from sqlalchemy import event as sqla_event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from werkzeug.utils import secure_filename
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.executors.pool import ThreadPoolExecutor as APSThreadPoolExecutor
 from apscheduler.triggers.date import DateTrigger
 from dotenv import load_dotenv
+from urllib.parse import urlparse
 import pytz
 
 # Google Cloud Storage imports
@@ -29,10 +51,30 @@ except ImportError:
 # Load environment variables
 load_dotenv()
 
+# Debug chatter goes through logging so the formatting cost is skipped
+# entirely when LOG_LEVEL is INFO or higher (the production default)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
+logger = logging.getLogger(__name__)
+
+# Default timezone for schedules and captions, built once at import
+IST = pytz.timezone('Asia/Kolkata')
+
+# Default posting slots for new accounts (1 PM / 10 PM)
+DEFAULT_SLOT_1 = dtime(13, 0)
+DEFAULT_SLOT_2 = dtime(22, 0)
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-this')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///instagram_automation.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Connection pool sized for the scheduler's background threads; pre-ping
+# avoids stale-connection errors on long-lived Postgres/MySQL deployments
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+}
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max file size
 
@@ -46,10 +88,48 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Initialize database
 db = SQLAlchemy(app)
-
-# Initialize scheduler
-scheduler = BackgroundScheduler()
-scheduler.start()
+# Schema changes ship as alembic revisions in migrations/ - run
+# `flask db upgrade` after pulling; create_all() only creates missing
+# tables and never alters existing ones
+migrate = Migrate(app, db)
+
+if 'sqlite' in app.config['SQLALCHEMY_DATABASE_URI']:
+    # WAL lets dashboard reads proceed while scheduler threads update post
+    # status; busy_timeout retries briefly instead of raising "database is
+    # locked". No-op for the Postgres/MySQL deployment path.
+    @sqla_event.listens_for(Engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA busy_timeout=5000')
+        cursor.execute('PRAGMA cache_size=-64000')
+        cursor.close()
+
+# Initialize scheduler - jobs persist in the app DB so scheduled posts
+# survive restarts, and misfire grace lets missed posts run after a deploy.
+# The jobstore shares the Flask-SQLAlchemy engine: building it from the raw
+# URI would resolve a relative sqlite path against CWD while Flask resolves
+# the same URI into instance/, splitting jobs into a second database.
+with app.app_context():
+    _jobstore = SQLAlchemyJobStore(engine=db.engine)
+scheduler = BackgroundScheduler(
+    jobstores={'default': _jobstore},
+    # 20 workers: at or below the HTTP pool_maxsize (50) and the DB
+    # pool_size + max_overflow (30), so a burst of due posts can't starve
+    # either pool
+    executors={'default': APSThreadPoolExecutor(max_workers=20)},
+    job_defaults={'misfire_grace_time': 3600, 'coalesce': True, 'max_instances': 1},
+    # run_dates are naive datetime.utcnow() values; pin the scheduler to UTC
+    # so they aren't reinterpreted in the host's local timezone
+    timezone=pytz.utc
+)
+# scheduler.start() happens in __main__: starting here let the jobstore
+# thread reconstitute due jobs while this module was still half-imported,
+# and APScheduler permanently deletes any job whose callable
+# ('app:execute_scheduled_post') can't be resolved yet.
 
 # Database Models
 class Account(db.Model):
@@ -63,12 +143,21 @@ class Account(db.Model):
     account_type = db.Column(db.String(50), default='business')
     niche = db.Column(db.String(100))
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    is_test = db.Column(db.Boolean, default=False, index=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
     
     # Relationships
+    # schedule rows are few and read wherever accounts are listed, so batch
+    # them with selectin instead of one lazy SELECT per account. posts stays
+    # lazy: it's unbounded and the views that need posts fetch them with
+    # explicit options()/aggregates.
     posts = db.relationship('Post', backref='account', lazy=True)
-    schedule = db.relationship('PostingSchedule', backref='account', lazy=True)
+    schedule = db.relationship('PostingSchedule', backref='account', lazy='selectin')
+
+    __table_args__ = (
+        db.Index('ix_accounts_active', 'is_active'),
+    )
 
 class Post(db.Model):
     """Post model for scheduled and published posts"""
@@ -78,15 +167,23 @@ class Post(db.Model):
     account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
     content_type = db.Column(db.String(50), nullable=False)  # 'image', 'carousel', 'story'
     caption = db.Column(db.Text)
-    media_urls = db.Column(db.Text)  # JSON array of image URLs
-    hashtags = db.Column(db.Text)  # JSON array of hashtags
+    media_urls = db.Column(db.JSON)  # JSON array of image URLs
+    hashtags = db.Column(db.JSON)  # JSON array of hashtags
     scheduled_time = db.Column(db.DateTime, nullable=False)
     actual_post_time = db.Column(db.DateTime)
     status = db.Column(db.String(50), default='scheduled')  # 'scheduled', 'posted', 'failed', 'cancelled'
     instagram_post_id = db.Column(db.String(255))
     error_message = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    __table_args__ = (
+        db.Index('ix_posts_status', 'status'),
+        db.Index('ix_posts_created_at', 'created_at'),
+        db.Index('ix_posts_status_sched', 'status', 'scheduled_time'),
+        db.Index('ix_posts_account_created', 'account_id', 'created_at'),
+        db.Index('ix_posts_account_sched_status', 'account_id', 'scheduled_time', 'status'),
+    )
 
 class PostingSchedule(db.Model):
     """Posting schedule configuration for each account"""
@@ -99,7 +196,7 @@ class PostingSchedule(db.Model):
     timezone = db.Column(db.String(50), default='Asia/Kolkata')
     variance_minutes = db.Column(db.Integer, default=15)
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
 
 class HashtagRepository(db.Model):
     """Common hashtag repository"""
@@ -110,7 +207,11 @@ class HashtagRepository(db.Model):
     category = db.Column(db.String(100))
     usage_count = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    __table_args__ = (
+        db.Index('ix_hashtag_active', 'is_active'),
+    )
 
 class CaptionTemplate(db.Model):
     """Caption templates for posts"""
@@ -119,19 +220,97 @@ class CaptionTemplate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     template = db.Column(db.Text, nullable=False)
-    variables = db.Column(db.Text)  # JSON array of variable names
+    variables = db.Column(db.JSON)  # JSON array of variable names
     category = db.Column(db.String(100))
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+# Instagram account IDs are 15-20 digit numbers; precompiled so validation
+# is a single regex match per call
+_ACCOUNT_ID_RE = re.compile(r'\d{15,20}')
+
+# Hosts we control/trust to serve media - skip the pre-flight HEAD probe
+# for URLs we just generated ourselves (e.g. fresh GCS uploads)
+_TRUSTED_MEDIA_HOSTS = {'storage.googleapis.com'}
+
+# Concurrency limits for outbound posting: at most one in-flight publish
+# flow per Instagram account (the Graph API rejects overlapping container
+# operations and 429s bursts), and a global cap so a scheduler burst across
+# many accounts can't saturate the API
+_IG_GLOBAL_LIMIT = threading.BoundedSemaphore(16)
+_account_locks = {}
+
+@contextmanager
+def _posting_slot(account_id):
+    """Hold the global and per-account posting slots for one publish flow"""
+    with _IG_GLOBAL_LIMIT:
+        # setdefault is a single atomic dict operation; a defaultdict
+        # factory can yield the GIL mid-creation and hand two racing
+        # threads two different semaphores for the same account
+        with _account_locks.setdefault(account_id, threading.Semaphore(1)):
+            yield
+
+# One TLS context shared by every pool the adapter creates, so session
+# tickets cached in the context let reconnects to graph.facebook.com resume
+# the TLS session (one RTT) instead of running a full handshake
+_TLS_CONTEXT = ssl.create_default_context()
+
+class _WideBufferAdapter(HTTPAdapter):
+    """HTTPAdapter with a 256 KiB socket send buffer and a shared TLS context.
+
+    Python's default send buffer caps outbound throughput well below what
+    the link supports; widening it per-adapter avoids monkey-patching
+    http.client globally. Graph API bodies are small today, but video and
+    multi-image flows go through the same session.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = kwargs.get('socket_options', []) + [
+            (socket.SOL_SOCKET, socket.SO_SNDBUF, 256 * 1024)
+        ]
+        kwargs.setdefault('ssl_context', _TLS_CONTEXT)
+        super().init_poolmanager(*args, **kwargs)
 
 # Instagram API Integration
 class InstagramAPI:
     """Instagram Graph API integration class"""
-    
+
+    # Account metadata changes slowly - cache validations for 10 minutes
+    ACCOUNT_INFO_TTL = 600  # seconds
+
+    # A media URL that answered a HEAD probe stays trusted for this long
+    URL_PROBE_TTL = 3600  # seconds
+
+    # Field sets probed by get_account_info; Basic Display first, then the
+    # business-account variant. me/accounts is the final fallback.
+    _ACCOUNT_INFO_FIELDS = ('id,username', 'id,username,account_type')
+    _ME_ACCOUNTS_URL = "https://graph.facebook.com/v18.0/me/accounts"
+
     def __init__(self):
         self.base_url = "https://graph.facebook.com/v23.0"
         self.default_token = os.getenv('INSTAGRAM_ACCESS_TOKEN')
-    
+        # Shared session so keep-alive reuses the TCP/TLS connection to
+        # graph.facebook.com instead of handshaking on every call.
+        # HTTP/2 multiplexing (httpx) was considered for parallel
+        # multi-account posting, but the pool below already keeps one warm
+        # connection per worker and the retry/error handling here is built
+        # on requests' exception hierarchy - not worth a second HTTP stack.
+        self.session = requests.Session()
+        self.session.mount('https://', _WideBufferAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=[429, 500, 502, 503, 504])
+        ))
+        # (account_id, token fingerprint) -> (result, expiry)
+        self._account_info_cache = {}
+        # image URL -> probe expiry; successes only, so a URL is HEAD-probed
+        # once per hour instead of before every post/carousel child
+        self._validated_urls = {}
+
+    # Pure string checks, so memoize them: upload/publish/carousel paths
+    # re-validate the same token and account id on every call
+    @lru_cache(maxsize=1024)
     def validate_access_token(self, access_token):
         """Validate if the access token is properly formatted"""
         if not access_token:
@@ -145,83 +324,97 @@ class InstagramAPI:
             
         return True, "Valid format"
     
+    @lru_cache(maxsize=1024)
     def validate_account_id(self, account_id):
         """Validate if the account ID is properly formatted"""
         if not account_id:
             return False, "Instagram Account ID is required"
-            
-        # Instagram account IDs are typically 17-18 digit numbers
-        if not account_id.isdigit():
-            return False, "Instagram Account ID must be numeric"
-            
-        if len(account_id) < 15 or len(account_id) > 20:
-            return False, "Instagram Account ID length is invalid (should be 15-20 digits)"
-            
+
+        if not _ACCOUNT_ID_RE.fullmatch(account_id):
+            return False, "Instagram Account ID must be a 15-20 digit number"
+
         return True, "Valid format"
     
-    def get_account_info(self, account_id, access_token=None):
+    def get_account_info(self, account_id, access_token=None, force_refresh=False):
         """Get Instagram account information"""
         token = access_token or self.default_token
-        
+
         # Validate inputs
         token_valid, token_msg = self.validate_access_token(token)
         if not token_valid:
             return {"error": f"Access Token Error: {token_msg}"}
-            
+
         account_valid, account_msg = self.validate_account_id(account_id)
         if not account_valid:
             return {"error": f"Account ID Error: {account_msg}"}
-        
-        # Try different API endpoints for Instagram
+
+        # Key on a token fingerprint rather than the raw token so cached
+        # entries never hold credentials
+        token_fingerprint = hashlib.sha256(token.encode()).hexdigest()[:16]
+        cache_key = (account_id, token_fingerprint)
+        if not force_refresh:
+            cached = self._account_info_cache.get(cache_key)
+            if cached and time.monotonic() < cached[1]:
+                return cached[0]
+
+        # Try different API endpoints for Instagram. The token travels in
+        # params, not interpolated into the URL, so requests handles the
+        # encoding and credentials stay out of connection-pool keys/logs.
+        account_url = f"{self.base_url}/{account_id}"
         endpoints_to_try = [
-            # Instagram Basic Display API endpoint
-            f"{self.base_url}/{account_id}?fields=id,username&access_token={token}",
-            # Instagram Graph API for business accounts
-            f"{self.base_url}/{account_id}?fields=id,username,account_type&access_token={token}",
-            # Alternative endpoint
-            f"https://graph.facebook.com/v18.0/me/accounts?access_token={token}"
+            (account_url, {'fields': fields, 'access_token': token})
+            for fields in self._ACCOUNT_INFO_FIELDS
         ]
-        
-        for i, url in enumerate(endpoints_to_try):
-            try:
-                if i == 2:  # Special handling for me/accounts endpoint
-                    response = requests.get(url)
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # Look for Instagram accounts in the response
-                    if 'data' in data:
-                        for account in data['data']:
-                            if account.get('id') == account_id:
-                                return {
-                                    'id': account.get('id'),
-                                    'username': account.get('name', 'Unknown'),
-                                    'account_type': 'business'
-                                }
-                    continue
-                
-                response = requests.get(url)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if 'error' not in data:
-                        # Success - return the account info
+        endpoints_to_try.append((self._ME_ACCOUNTS_URL, {'access_token': token}))
+
+
+        def parse_response(i, response):
+            """Extract account info from an endpoint response, or None"""
+            if response.status_code != 200:
+                logger.debug("HTTP %d on endpoint %d: %s", response.status_code, i + 1, response.text)
+                return None
+            data = response.json()
+            if i == 2:  # me/accounts returns a list to search
+                for account in data.get('data', []):
+                    if account.get('id') == account_id:
                         return {
-                            'id': data.get('id', account_id),
-                            'username': data.get('username', 'Unknown'),
-                            'account_type': data.get('account_type', 'business'),
-                            'followers_count': data.get('followers_count', 0),
-                            'media_count': data.get('media_count', 0)
+                            'id': account.get('id'),
+                            'username': account.get('name', 'Unknown'),
+                            'account_type': 'business'
                         }
-                    else:
-                        print(f"API Error on endpoint {i+1}: {data.get('error', {}).get('message', 'Unknown error')}")
-                else:
-                    print(f"HTTP {response.status_code} on endpoint {i+1}: {response.text}")
-                    
-            except requests.exceptions.RequestException as e:
-                print(f"Network error on endpoint {i+1}: {e}")
-                continue
-        
+                return None
+            if 'error' in data:
+                logger.debug("API Error on endpoint %d: %s", i + 1,
+                             data.get('error', {}).get('message', 'Unknown error'))
+                return None
+            return {
+                'id': data.get('id', account_id),
+                'username': data.get('username', 'Unknown'),
+                'account_type': data.get('account_type', 'business'),
+                'followers_count': data.get('followers_count', 0),
+                'media_count': data.get('media_count', 0)
+            }
+
+        # Probe all endpoints concurrently so a failing endpoint costs
+        # max(rtt) instead of sum(rtts), but consume results in submission
+        # order: the endpoints are listed by preference (me/accounts only
+        # knows the page name, not followers/media counts), and taking
+        # whichever finishes first would make the stored username
+        # nondeterministic
+        with ThreadPoolExecutor(max_workers=len(endpoints_to_try)) as executor:
+            futures = [executor.submit(self.session.get, url, params=params, timeout=10)
+                       for url, params in endpoints_to_try]
+            for i, future in enumerate(futures):
+                try:
+                    info = parse_response(i, future.result())
+                except requests.exceptions.RequestException as e:
+                    logger.warning("Network error on endpoint %d: %s", i + 1, e)
+                    continue
+                if info:
+                    self._account_info_cache[cache_key] = (
+                        info, time.monotonic() + self.ACCOUNT_INFO_TTL)
+                    return info
+
         # If all endpoints fail, return detailed error
         return {
             "error": "Unable to validate Instagram account. Please check:\n"
@@ -231,128 +424,135 @@ class InstagramAPI:
                    "4. The account is connected to your Facebook app"
         }
     
+    @staticmethod
+    def _is_test(token):
+        """Test-account tokens start with 'test' and never hit the API"""
+        return bool(token and token.startswith('test'))
+
+    def _probe_image_url(self, url, timeout=10):
+        """HEAD-probe a media URL, remembering successes for URL_PROBE_TTL.
+
+        Instagram fetches the URL itself and reports a clear error if it is
+        unreachable, so the probe exists only to fail fast with a better
+        message; repeating it for a URL that already answered (common across
+        the upload->publish flow and scheduler retries) just doubles RTT.
+        Returns (ok, error_message).
+        """
+        expiry = self._validated_urls.get(url)
+        if expiry and time.monotonic() < expiry:
+            return True, None
+        try:
+            resp = self.session.head(url, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            return False, str(e)
+        if resp.status_code != 200:
+            return False, f"HTTP {resp.status_code}"
+        if len(self._validated_urls) > 1024:
+            self._validated_urls.clear()
+        self._validated_urls[url] = time.monotonic() + self.URL_PROBE_TTL
+        return True, None
+
     def upload_media(self, account_id, image_url, caption, access_token=None):
         """Upload media to Instagram (create container)"""
         token = access_token or self.default_token
         url = f"{self.base_url}/{account_id}/media"
         
         # Comprehensive logging for debugging
-        print(f"\n=== INSTAGRAM API UPLOAD DEBUG ===")
-        print(f"API URL: {url}")
-        print(f"Account ID: {account_id}")
-        print(f"Image URL: {image_url}")
-        print(f"Caption length: {len(caption) if caption else 0}")
-        print(f"Access token (first 20 chars): {token[:20] if token else 'None'}...")
-        
+        logger.debug("=== INSTAGRAM API UPLOAD ===")
+        logger.debug("API URL: %s", url)
+        logger.debug("Account ID: %s", account_id)
+        logger.debug("Image URL: %s", image_url)
+        logger.debug("Caption length: %d", len(caption) if caption else 0)
+
         # Validate inputs
         if not image_url:
-            print("ERROR: Image URL is required")
+            logger.warning("Image URL is required")
             return {"error": "Image URL is required"}
-            
+
         if not image_url.startswith(('http://', 'https://')):
-            print("ERROR: Image URL must be HTTP/HTTPS")
+            logger.warning("Image URL must be HTTP/HTTPS: %s", image_url)
             return {"error": "Image URL must be a valid HTTP/HTTPS URL accessible by Instagram"}
-        
+
         # Test image URL accessibility (key assumption to validate)
-        print(f"Testing image URL accessibility...")
-        
         # Special handling for localhost URLs
         if 'localhost' in image_url or '127.0.0.1' in image_url:
-            print(f"DETECTED: Localhost URL - this will fail with real Instagram accounts")
-            print(f"URL: {image_url}")
-            
+            logger.debug("Localhost URL detected - this will fail with real Instagram accounts: %s", image_url)
+
             # Test if URL is accessible locally
             try:
-                image_response = requests.head(image_url, timeout=5)
-                print(f"Local accessibility: {image_response.status_code}")
-                
+                image_response = self.session.head(image_url, timeout=5)
+                logger.debug("Local accessibility: %s", image_response.status_code)
+
                 if image_response.status_code == 200:
-                    print(f"✅ Image is accessible locally")
-                    print(f"❌ But Instagram CANNOT access localhost URLs")
                     return {"error": f"Instagram cannot access localhost URLs. Image is available locally but not publicly accessible. Use ngrok (ngrok http 5555) or upload to cloud storage to make it publicly accessible."}
                 else:
-                    print(f"❌ Image not even accessible locally: {image_response.status_code}")
                     return {"error": f"Image not accessible even locally: HTTP {image_response.status_code}"}
-                    
+
             except requests.exceptions.RequestException as e:
-                print(f"❌ Local accessibility test failed: {e}")
+                logger.warning("Local accessibility test failed: %s", e)
                 return {"error": f"Cannot access image URL locally: {str(e)}"}
-        
+
+        elif urlparse(image_url).hostname in _TRUSTED_MEDIA_HOSTS:
+            # URL points at storage we just uploaded to - probing it again
+            # only adds a round-trip
+            logger.debug("Trusted media host - skipping accessibility probe")
+
         else:
-            # Test public URL accessibility
-            try:
-                image_response = requests.head(image_url, timeout=10)
-                print(f"Public URL accessibility: {image_response.status_code}")
-                print(f"Response headers: {dict(image_response.headers)}")
-                
-                if image_response.status_code != 200:
-                    print(f"CRITICAL: Public URL not accessible (status: {image_response.status_code})")
-                    return {"error": f"Image URL not accessible: HTTP {image_response.status_code}. Please check the URL and ensure it's publicly accessible."}
-                else:
-                    print(f"✅ Public URL is accessible - proceeding with Instagram API call")
-                    
-            except requests.exceptions.RequestException as e:
-                print(f"CRITICAL: Cannot access public URL: {e}")
-                return {"error": f"Cannot access image URL: {str(e)}. Please check the URL and network connectivity."}
-        
+            # Test public URL accessibility (cached per URL)
+            ok, probe_error = self._probe_image_url(image_url)
+            if not ok:
+                logger.warning("Public URL not accessible: %s", probe_error)
+                return {"error": f"Image URL not accessible: {probe_error}. Please check the URL and ensure it's publicly accessible."}
+
         # Prepare request data
         data = {
             'image_url': image_url,
             'caption': caption or '',
             'access_token': token
         }
-        
-        print(f"Request data: {data}")
-        print(f"Proceeding with Instagram API call...")
-        
+
         try:
-            print(f"Making Instagram API request...")
-            response = requests.post(url, data=data, timeout=30)
-            
-            print(f"Instagram API response status: {response.status_code}")
-            print(f"Instagram API response headers: {dict(response.headers)}")
-            
-            try:
-                response_json = response.json()
-                print(f"Instagram API response body: {response_json}")
-            except:
-                print(f"Instagram API response text: {response.text}")
-            
+            logger.debug("Making Instagram API request...")
+            response = self.session.post(url, data=data, timeout=30)
+
+            logger.debug("Instagram API response status: %s", response.status_code)
+            logger.debug("Instagram API response headers: %s", response.headers)
+            logger.debug("Instagram API response text: %s", response.text)
+
             if response.status_code == 200:
                 result = response.json()
                 if 'id' in result:
-                    print(f"SUCCESS: Media container created with ID: {result['id']}")
+                    logger.debug("Media container created with ID: %s", result['id'])
                     return result
                 else:
                     error_msg = result.get('error', {}).get('message', 'Unknown error')
-                    print(f"ERROR: API success but no ID - {error_msg}")
+                    logger.warning("API success but no ID - %s", error_msg)
                     return {"error": f"Instagram API error: {error_msg}"}
             else:
                 try:
                     error_data = response.json()
                     error_message = error_data.get('error', {}).get('message', f'HTTP {response.status_code}')
-                    print(f"ERROR: API failed with message: {error_message}")
-                    
+                    logger.warning("API failed with message: %s", error_message)
+
                     # Analysis of common error patterns
                     if 'media type' in error_message.lower():
-                        print("ANALYSIS: 'media type' error - Instagram couldn't access/validate the image")
-                        print("LIKELY CAUSE: Image URL is not publicly accessible")
-                        print("SOLUTION: Use ngrok, cloud storage, or public image hosting")
+                        logger.debug("'media type' error - Instagram couldn't access/validate the image; "
+                                     "likely cause is a URL that is not publicly accessible")
                     elif 'permission' in error_message.lower():
-                        print("ANALYSIS: Permission error - check access token permissions")
+                        logger.debug("Permission error - check access token permissions")
                     elif 'account' in error_message.lower():
-                        print("ANALYSIS: Account error - check account ID and type")
+                        logger.debug("Account error - check account ID and type")
                     elif 'url' in error_message.lower():
-                        print("ANALYSIS: URL error - image URL format or accessibility issue")
-                        
+                        logger.debug("URL error - image URL format or accessibility issue")
+
                 except:
                     error_message = f"HTTP {response.status_code}: {response.text}"
-                    print(f"ERROR: Failed to parse error response: {error_message}")
-                
+                    logger.warning("Failed to parse error response: %s", error_message)
+
                 return {"error": f"Failed to upload media: {error_message}"}
-                
+
         except requests.exceptions.RequestException as e:
-            print(f"ERROR: Network error during upload: {e}")
+            logger.warning("Network error during upload: %s", e)
             return {"error": f"Network error during media upload: {str(e)}"}
     
     def publish_media(self, account_id, creation_id, access_token=None, caption=None):
@@ -370,8 +570,8 @@ class InstagramAPI:
             data['caption'] = caption
         
         try:
-            response = requests.post(url, data=data)
-            
+            response = self.session.post(url, data=data)
+
             if response.status_code == 200:
                 result = response.json()
                 if 'id' in result:
@@ -393,42 +593,39 @@ class InstagramAPI:
     def post_to_instagram(self, account_id, image_url, caption, access_token=None):
         """Complete flow: upload and publish to Instagram"""
         
-        # Check if this is a test account
-        if access_token and access_token.startswith('test'):
-            print(f"\n=== TEST ACCOUNT DETECTED ===")
-            print(f"Account ID: {account_id}")
-            print(f"Image URL: {image_url}")
-            print(f"Caption: {caption[:100]}...")
-            print(f"Skipping actual Instagram API call for test account")
-            
+        # Check if this is a test account - before any validation or API prep
+        if self._is_test(access_token):
+            logger.debug("Test account detected (account %s) - skipping actual Instagram API call", account_id)
+
             # Return success for test accounts
             return {
                 "id": f"test_post_{account_id}_{int(time.time())}",
                 "message": "Test post created successfully (no actual Instagram API call)"
             }
         
-        # Step 1: Upload media (create container)
-        upload_result = self.upload_media(account_id, image_url, caption, access_token)
-        
-        if not upload_result:
-            return {"error": "Failed to upload media - no response from Instagram"}
-        
-        if 'error' in upload_result:
-            return {"error": f"Upload failed: {upload_result['error']}"}
-        
-        if 'id' not in upload_result:
-            return {"error": "Upload failed - no container ID returned"}
-        
-        # Step 2: Publish media
-        publish_result = self.publish_media(account_id, upload_result['id'], access_token)
-        
-        if not publish_result:
-            return {"error": "Failed to publish media - no response from Instagram"}
-        
-        if 'error' in publish_result:
-            return {"error": f"Publish failed: {publish_result['error']}"}
-        
-        return publish_result
+        with _posting_slot(account_id):
+            # Step 1: Upload media (create container)
+            upload_result = self.upload_media(account_id, image_url, caption, access_token)
+
+            if not upload_result:
+                return {"error": "Failed to upload media - no response from Instagram"}
+
+            if 'error' in upload_result:
+                return {"error": f"Upload failed: {upload_result['error']}"}
+
+            if 'id' not in upload_result:
+                return {"error": "Upload failed - no container ID returned"}
+
+            # Step 2: Publish media
+            publish_result = self.publish_media(account_id, upload_result['id'], access_token)
+
+            if not publish_result:
+                return {"error": "Failed to publish media - no response from Instagram"}
+
+            if 'error' in publish_result:
+                return {"error": f"Publish failed: {publish_result['error']}"}
+
+            return publish_result
 
     def post_carousel_to_instagram(self, account_id, image_urls, caption, access_token=None):
         """Create and publish a carousel post (up to 10 images).
@@ -444,11 +641,9 @@ class InstagramAPI:
         token = access_token or self.default_token
 
         # Test account shortcut
-        if token and token.startswith('test'):
-            print("\n=== TEST ACCOUNT DETECTED (CAROUSEL) ===")
-            print(f"Account ID: {account_id}")
-            print(f"Num images: {len(image_urls)}")
-            print(f"Caption: {caption[:100] if caption else ''}...")
+        if self._is_test(token):
+            logger.debug("Test account detected (carousel, account %s, %d images) - skipping API call",
+                         account_id, len(image_urls) if image_urls else 0)
             return {
                 "id": f"test_carousel_{account_id}_{int(time.time())}",
                 "message": "Test carousel created successfully (no actual Instagram API call)"
@@ -461,158 +656,208 @@ class InstagramAPI:
         if len(image_urls) > 10:
             return {"error": "Instagram carousel supports at most 10 images"}
 
-        # Accessibility check for each URL
+        # Accessibility check for each URL (cached per URL; trusted hosts
+        # such as GCS were validated at upload time and are skipped).
+        # Probe the rest concurrently - serial HEADs cost one RTT each.
+        to_probe = []
         for idx, url in enumerate(image_urls, start=1):
             if not url or not url.startswith(('http://', 'https://')):
                 return {"error": f"Invalid image URL at position {idx}: {url}"}
-            try:
-                resp = requests.head(url, timeout=10)
-                if resp.status_code != 200:
-                    return {"error": f"Image URL not accessible (HTTP {resp.status_code}) at position {idx}: {url}"}
-            except requests.exceptions.RequestException as e:
-                return {"error": f"Cannot access image URL at position {idx}: {e}"}
+            if urlparse(url).hostname not in _TRUSTED_MEDIA_HOSTS:
+                to_probe.append((idx, url))
+        if to_probe:
+            with ThreadPoolExecutor(max_workers=min(len(to_probe), 8)) as executor:
+                probe_results = list(executor.map(
+                    lambda pair: pair + self._probe_image_url(pair[1]), to_probe))
+            for idx, url, ok, probe_error in probe_results:
+                if not ok:
+                    return {"error": f"Image URL not accessible ({probe_error}) at position {idx}: {url}"}
 
         base_media_url = f"{self.base_url}/{account_id}/media"
 
-        # Step 1: Create child containers
-        child_ids = []
-        for idx, url in enumerate(image_urls, start=1):
-            data = {
-                'image_url': url,
-                'is_carousel_item': 'true',
-                'access_token': token
-            }
-            try:
-                print(f"Creating carousel child {idx}/{len(image_urls)}: {url}")
-                r = requests.post(base_media_url, data=data, timeout=30)
-                if r.status_code == 200:
-                    body = r.json()
-                    if 'id' in body:
-                        child_ids.append(body['id'])
-                        print(f"Child created: {body['id']}")
-                    else:
+        with _posting_slot(account_id):
+            # Step 1: Create child containers. Each child is independent, so
+            # issue the requests concurrently instead of paying one round trip
+            # per image; results are collected in submission order so the
+            # carousel keeps the user's image ordering.
+            def create_child(idx, url):
+                data = {
+                    'image_url': url,
+                    'is_carousel_item': 'true',
+                    'access_token': token
+                }
+                try:
+                    logger.debug("Creating carousel child %d/%d: %s", idx, len(image_urls), url)
+                    r = self.session.post(base_media_url, data=data, timeout=30)
+                    if r.status_code == 200:
+                        body = r.json()
+                        if 'id' in body:
+                            logger.debug("Child created: %s", body['id'])
+                            return body['id'], None
                         msg = body.get('error', {}).get('message', 'Unknown error')
-                        return {"error": f"Failed to create child container {idx}: {msg}"}
-                else:
+                        return None, f"Failed to create child container {idx}: {msg}"
                     try:
                         err = r.json().get('error', {}).get('message', f'HTTP {r.status_code}')
                     except Exception:
                         err = f"HTTP {r.status_code}: {r.text}"
-                    return {"error": f"Failed to create child container {idx}: {err}"}
-            except requests.exceptions.RequestException as e:
-                return {"error": f"Network error creating child {idx}: {e}"}
-
-        if not child_ids:
-            return {"error": "No child containers could be created for carousel"}
-
-        # Optional: poll child status (lightweight), but images usually are ready immediately. Skipping for speed.
-
-        # Step 2: Create parent container
-        parent_payload = {
-            'media_type': 'CAROUSEL',
-            'children': ','.join(child_ids),  # API accepts comma-separated list
-            'access_token': token
-            # Note: For carousel, we'll set caption at publish time for better control
-        }
+                    return None, f"Failed to create child container {idx}: {err}"
+                except requests.exceptions.RequestException as e:
+                    return None, f"Network error creating child {idx}: {e}"
+
+            child_ids = []
+            with ThreadPoolExecutor(max_workers=min(len(image_urls), 8)) as executor:
+                futures = [executor.submit(create_child, idx, url)
+                           for idx, url in enumerate(image_urls, start=1)]
+                for future in futures:
+                    child_id, error = future.result()
+                    if error:
+                        for pending in futures:
+                            pending.cancel()
+                        return {"error": error}
+                    child_ids.append(child_id)
+
+            if not child_ids:
+                return {"error": "No child containers could be created for carousel"}
+
+            # Optional: poll child status (lightweight), but images usually are ready immediately. Skipping for speed.
+
+            # Step 2: Create parent container
+            parent_payload = {
+                'media_type': 'CAROUSEL',
+                'children': ','.join(child_ids),  # API accepts comma-separated list
+                'access_token': token
+                # Note: For carousel, we'll set caption at publish time for better control
+            }
 
-        try:
-            print("Creating parent carousel container...")
-            parent_resp = requests.post(base_media_url, data=parent_payload, timeout=30)
-            if parent_resp.status_code != 200:
-                try:
-                    err = parent_resp.json().get('error', {}).get('message', f'HTTP {parent_resp.status_code}')
-                except Exception:
-                    err = f"HTTP {parent_resp.status_code}: {parent_resp.text}"
-                return {"error": f"Failed to create carousel container: {err}"}
+            try:
+                logger.debug("Creating parent carousel container...")
+                parent_resp = self.session.post(base_media_url, data=parent_payload, timeout=30)
+                if parent_resp.status_code != 200:
+                    try:
+                        err = parent_resp.json().get('error', {}).get('message', f'HTTP {parent_resp.status_code}')
+                    except Exception:
+                        err = f"HTTP {parent_resp.status_code}: {parent_resp.text}"
+                    return {"error": f"Failed to create carousel container: {err}"}
 
-            parent_body = parent_resp.json()
-            if 'id' not in parent_body:
-                return {"error": "Carousel container created but no ID returned"}
+                parent_body = parent_resp.json()
+                if 'id' not in parent_body:
+                    return {"error": "Carousel container created but no ID returned"}
 
-            creation_id = parent_body['id']
-            print(f"Carousel container ID: {creation_id}")
+                creation_id = parent_body['id']
+                logger.debug("Carousel container ID: %s", creation_id)
 
-            # Step 3: Publish
-            publish_result = self.publish_media(account_id, creation_id, access_token, caption)
-            return publish_result
+                # Step 3: Publish
+                publish_result = self.publish_media(account_id, creation_id, access_token, caption)
+                return publish_result
 
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Network error creating/publishing carousel: {e}"}
+            except requests.exceptions.RequestException as e:
+                return {"error": f"Network error creating/publishing carousel: {e}"}
 
     def post_reel_to_instagram(self, account_id, video_url, caption, access_token=None):
         """Create and publish a REELS video (video_url)."""
         token = access_token or self.default_token
+
+        # Test account shortcut - same fast path as feed and carousel posts
+        if self._is_test(token):
+            logger.debug("Test account detected (reel, account %s) - skipping API call", account_id)
+            return {
+                "id": f"test_reel_{account_id}_{int(time.time())}",
+                "message": "Test reel created successfully (no actual Instagram API call)"
+            }
+
         base_media_url = f"{self.base_url}/{account_id}/media"
 
         if not video_url or not video_url.startswith(("http://", "https://")):
             return {"error": "Video URL must be a valid HTTP/HTTPS URL"}
 
-        # Check accessibility of video
-        try:
-            head = requests.head(video_url, timeout=15)
-            if head.status_code != 200:
-                return {"error": f"Video URL not accessible: HTTP {head.status_code}"}
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Cannot access video URL: {e}"}
+        with _posting_slot(account_id):
+            # Check accessibility of video
+            try:
+                head = self.session.head(video_url, timeout=15)
+                if head.status_code != 200:
+                    return {"error": f"Video URL not accessible: HTTP {head.status_code}"}
+            except requests.exceptions.RequestException as e:
+                return {"error": f"Cannot access video URL: {e}"}
 
-        data = {
-            'media_type': 'REELS',
-            'video_url': video_url,
-            'access_token': token
-            # Note: Caption for REELS should be set at publish time, not container creation
-        }
+            data = {
+                'media_type': 'REELS',
+                'video_url': video_url,
+                'access_token': token
+                # Note: Caption for REELS should be set at publish time, not container creation
+            }
 
-        try:
-            print("Creating REELS container...")
-            print(f"REELS payload: {data}")
-            resp = requests.post(base_media_url, data=data, timeout=60)
-            print(f"Instagram REELS response: {resp.status_code} - {resp.text[:500]}")
-            if resp.status_code != 200:
-                try:
-                    msg = resp.json().get('error', {}).get('message', f'HTTP {resp.status_code}')
-                except Exception:
-                    msg = f"HTTP {resp.status_code}: {resp.text}"
-                return {"error": f"Failed to create REELS container: {msg}"}
-
-            creation_id = resp.json().get('id')
-            if not creation_id:
-                return {"error": "No creation_id returned for REELS container"}
-
-            # Poll for status
-            status_url = f"{self.base_url}/{creation_id}"
-            for attempt in range(20):
-                try:
-                    s = requests.get(status_url, params={'fields': 'status_code', 'access_token': token}, timeout=30)
-                    body = s.json()
-                    status = body.get('status_code')
-                    print(f"REELS container status attempt {attempt+1}: {status}")
-                    if status == 'FINISHED':
-                        break
-                    if status in ('ERROR', 'EXPIRED'):
-                        return {"error": f"REELS container status: {status}"}
-                except requests.exceptions.RequestException as e:
-                    print(f"Status poll error: {e}")
-                time.sleep(10)
-            else:
-                return {"error": "REELS container not ready after polling"}
+            try:
+                logger.debug("Creating REELS container...")
+                resp = self.session.post(base_media_url, data=data, timeout=60)
+                logger.debug("Instagram REELS response: %s - %.500s", resp.status_code, resp.text)
+                if resp.status_code != 200:
+                    try:
+                        msg = resp.json().get('error', {}).get('message', f'HTTP {resp.status_code}')
+                    except Exception:
+                        msg = f"HTTP {resp.status_code}: {resp.text}"
+                    return {"error": f"Failed to create REELS container: {msg}"}
 
-            # Don't pass caption to publish for reels - it must only be set during container creation
-            return self.publish_media(account_id, creation_id, access_token)
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Network error during REELS flow: {e}"}
+                creation_id = resp.json().get('id')
+                if not creation_id:
+                    return {"error": "No creation_id returned for REELS container"}
+
+                # Poll for status
+                status_url = f"{self.base_url}/{creation_id}"
+                for attempt in range(20):
+                    try:
+                        s = self.session.get(status_url, params={'fields': 'status_code', 'access_token': token}, timeout=30)
+                        body = s.json()
+                        status = body.get('status_code')
+                        logger.debug("REELS container status attempt %d: %s", attempt + 1, status)
+                        if status == 'FINISHED':
+                            break
+                        if status in ('ERROR', 'EXPIRED'):
+                            return {"error": f"REELS container status: {status}"}
+                    except requests.exceptions.RequestException as e:
+                        logger.warning("Status poll error: %s", e)
+                    time.sleep(10)
+                else:
+                    return {"error": "REELS container not ready after polling"}
+
+                # Don't pass caption to publish for reels - it must only be set during container creation
+                return self.publish_media(account_id, creation_id, access_token)
+            except requests.exceptions.RequestException as e:
+                return {"error": f"Network error during REELS flow: {e}"}
 
 # Global Instagram API instance
 instagram_api = InstagramAPI()
 
 # Utility Functions
+
+# Shared session for URL accessibility probes (ngrok detection, image checks)
+# so repeated HEAD requests reuse connections
+_probe_session = requests.Session()
+_probe_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+_probe_session.mount('http://', _probe_adapter)
+_probe_session.mount('https://', _probe_adapter)
+
+# The tunnel URL is stable for the life of the ngrok process, so cache the
+# detection result briefly instead of probing before every post
+_NGROK_CACHE_TTL = 60  # seconds
+_ngrok_cache = {'url': None, 'ts': None}
+
 def detect_ngrok_url():
-    """Detect if ngrok is running and get the public URL"""
+    """Detect if ngrok is running and get the public URL (cached ~60s)"""
+    if _ngrok_cache['ts'] is not None and \
+            time.monotonic() - _ngrok_cache['ts'] < _NGROK_CACHE_TTL:
+        return _ngrok_cache['url']
+    url = _detect_ngrok_url_uncached()
+    _ngrok_cache.update(url=url, ts=time.monotonic())
+    return url
+
+def _detect_ngrok_url_uncached():
+    """Probe the NGROK_URL env var and the local ngrok API"""
     try:
         # Check environment variable first
         ngrok_url = os.getenv('NGROK_URL')
         if ngrok_url:
             # Validate the URL
-            response = requests.head(ngrok_url, timeout=5)
+            response = _probe_session.head(ngrok_url, timeout=5)
             if response.status_code < 400:
                 return ngrok_url.rstrip('/')
     except:
@@ -620,7 +865,7 @@ def detect_ngrok_url():
     
     try:
         # Try to get ngrok tunnels from ngrok API
-        response = requests.get('http://127.0.0.1:4040/api/tunnels', timeout=5)
+        response = _probe_session.get('http://127.0.0.1:4040/api/tunnels', timeout=5)
         if response.status_code == 200:
             data = response.json()
             for tunnel in data.get('tunnels', []):
@@ -636,11 +881,38 @@ def detect_ngrok_url():
 def validate_image_accessibility(image_url):
     """Validate that an image URL is accessible"""
     try:
-        response = requests.head(image_url, timeout=10)
+        response = _probe_session.head(image_url, timeout=10)
         return response.status_code == 200, response.status_code
     except requests.exceptions.RequestException as e:
         return False, str(e)
 
+# File extensions are alphanumeric (jpg, mp4, m4v, ...)
+_EXT_RE = re.compile(r'[A-Za-z0-9]{1,8}')
+
+# 1 MB copy buffer for local saves - FileStorage.save defaults to 16 KB
+# chunks, which costs dozens of extra write syscalls per image and
+# thousands per video
+_SAVE_BUFFER = 1024 * 1024
+
+def hashed_upload_filename(file):
+    """Content-addressed filename: blake2b of the bytes plus the extension.
+
+    Two uploads of the same image map to the same name and different
+    images can never collide, so no exists()/rename dance is needed in
+    the uploads folder.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: file.stream.read(65536), b''):
+        hasher.update(chunk)
+    file.stream.seek(0)
+    # Only the extension survives into the stored name, so sanitize just
+    # that instead of running secure_filename's regexes over the whole name
+    _, dot, ext = file.filename.rpartition('.')
+    ext = ext.lower()
+    if dot and _EXT_RE.fullmatch(ext):
+        return f"{hasher.hexdigest()}.{ext}"
+    return hasher.hexdigest()
+
 def calculate_post_time(base_time, variance_minutes=15):
     """Calculate actual posting time with random variance"""
     variance_seconds = variance_minutes * 60
@@ -650,7 +922,9 @@ def calculate_post_time(base_time, variance_minutes=15):
 # Google Cloud Storage Functions
 class GoogleCloudStorage:
     """Google Cloud Storage helper class"""
-    
+
+    STATUS_TTL = 30  # seconds - get_status() is polled from several routes
+
     def __init__(self):
         self.bucket_name = app.config['GCS_BUCKET_NAME']
         self.project_id = app.config['GCS_PROJECT_ID']
@@ -658,10 +932,12 @@ class GoogleCloudStorage:
         self.bucket = None
         self.available = GCS_AVAILABLE
         self.authenticated = False
-        
+        self._bucket_verified = None  # lazily checked on first use
+        self._status_cache = None  # (status dict, expiry)
+
         if self.available:
             self._initialize_client()
-    
+
     def _initialize_client(self):
         """Initialize GCS client with authentication"""
         try:
@@ -670,20 +946,17 @@ class GoogleCloudStorage:
                 self.client = storage.Client(project=self.project_id)
             else:
                 self.client = storage.Client()
-            
-            # Test authentication by trying to get bucket info
+
             self.bucket = self.client.bucket(self.bucket_name)
-            
-            # Test if bucket exists and is accessible
-            if self.bucket.exists():
-                self.authenticated = True
-                print(f"✅ Google Cloud Storage initialized successfully")
-                print(f"   Bucket: {self.bucket_name}")
-                print(f"   Project: {self.project_id or 'default'}")
-            else:
-                print(f"⚠️  GCS Bucket '{self.bucket_name}' does not exist or is not accessible")
-                self.authenticated = False
-                
+
+            # Don't probe bucket.exists() here - that's an HTTPS round-trip
+            # on every boot for an essentially static answer. Assume OK and
+            # verify lazily on first use.
+            self.authenticated = True
+            print(f"✅ Google Cloud Storage initialized successfully")
+            print(f"   Bucket: {self.bucket_name}")
+            print(f"   Project: {self.project_id or 'default'}")
+
         except DefaultCredentialsError:
             print(f"❌ GCS Authentication failed: No valid credentials found")
             print(f"   Set GOOGLE_APPLICATION_CREDENTIALS or use: gcloud auth application-default login")
@@ -691,60 +964,75 @@ class GoogleCloudStorage:
         except Exception as e:
             print(f"❌ GCS Initialization failed: {e}")
             self.authenticated = False
-    
+
+    def _verify_bucket(self):
+        """Check bucket accessibility once and cache the result"""
+        if self._bucket_verified is None:
+            try:
+                self._bucket_verified = self.bucket.exists()
+            except Exception as e:
+                logger.warning("GCS bucket check failed: %s", e)
+                self._bucket_verified = False
+            if not self._bucket_verified:
+                logger.warning("GCS Bucket '%s' does not exist or is not accessible",
+                               self.bucket_name)
+                self.authenticated = False
+        return self._bucket_verified
+
     def is_available(self):
         """Check if GCS is available and authenticated"""
         return self.available and self.authenticated
-    
+
     def upload_file(self, file_obj, filename, content_type=None):
         """Upload file to Google Cloud Storage"""
-        if not self.is_available():
+        if not self.is_available() or not self._verify_bucket():
             return None, "Google Cloud Storage not available or not authenticated"
-        
+
         try:
-            # Generate unique filename with timestamp
+            # Generate unique filename; the random suffix keeps concurrent
+            # same-second uploads (e.g. carousel workers) from colliding
             timestamp = int(time.time())
             safe_filename = secure_filename(filename)
-            unique_filename = f"instagram_uploads/{timestamp}_{safe_filename}"
-            
+            unique_filename = f"instagram_uploads/{timestamp}_{secrets.token_hex(4)}_{safe_filename}"
+
             # Create blob and upload
             blob = self.bucket.blob(unique_filename)
-            
-            # Set content type if provided
-            if content_type:
-                blob.content_type = content_type
-            
-            # Upload file
-            file_obj.seek(0)  # Reset file pointer
-            blob.upload_from_file(file_obj)
-
-            # Attempt to make blob publicly readable.
-            # In environments with Uniform Bucket-Level Access (UBLA) or org policies
-            # that disable object ACLs, this will fail. We handle that gracefully and
-            # rely on bucket-level IAM (e.g., allUsers: roles/storage.objectViewer).
-            public_url = blob.public_url
-            try:
-                blob.make_public()
-            except Exception as make_public_error:
-                print(
-                    "⚠️  Unable to set object ACL via make_public(). "
-                    "This is expected with Uniform Bucket-Level Access or org policies. "
-                    f"Continuing with bucket-level IAM. Details: {make_public_error}"
-                )
-            
-            print(f"✅ File uploaded to GCS successfully")
-            print(f"   Filename: {unique_filename}")
-            print(f"   Public URL: {public_url}")
-            
+
+            # Set content type, guessing from the filename if not provided
+            if not content_type:
+                content_type = mimetypes.guess_type(filename)[0]
+
+            # Size the transfer to the file: small files go up in one
+            # request, while large ones use a resumable session with 8 MB
+            # chunks instead of buffering the whole body
+            file_obj.seek(0, os.SEEK_END)
+            size = file_obj.tell()
+            file_obj.seek(0)
+            if size > 8 * 1024 * 1024:
+                blob.chunk_size = 8 * 1024 * 1024
+
+            blob.upload_from_file(file_obj, size=size, content_type=content_type)
+
+            # Objects are readable through bucket-level IAM
+            # (allUsers: roles/storage.objectViewer) - a per-object
+            # make_public() ACL call would be an extra API round-trip and
+            # fails outright under Uniform Bucket-Level Access.
+            public_url = f"https://storage.googleapis.com/{self.bucket_name}/{unique_filename}"
+
+            logger.debug("File uploaded to GCS: %s -> %s", unique_filename, public_url)
+
             return public_url, None
-            
+
         except Exception as e:
             error_msg = f"Failed to upload to Google Cloud Storage: {str(e)}"
-            print(f"❌ {error_msg}")
+            logger.warning("%s", error_msg)
             return None, error_msg
     
     def get_status(self):
-        """Get detailed status of GCS configuration"""
+        """Get detailed status of GCS configuration (cached ~30s)"""
+        if self._status_cache and time.monotonic() < self._status_cache[1]:
+            return self._status_cache[0]
+
         status = {
             'available': self.available,
             'authenticated': self.authenticated,
@@ -754,67 +1042,106 @@ class GoogleCloudStorage:
         }
         
         if self.authenticated and self.bucket:
-            try:
-                status['bucket_exists'] = self.bucket.exists()
-            except:
-                status['bucket_exists'] = False
-        
+            status['bucket_exists'] = bool(self._verify_bucket())
+
+        self._status_cache = (status, time.monotonic() + self.STATUS_TTL)
         return status
 
 # Initialize GCS instance
 gcs = GoogleCloudStorage()
 
+# Active hashtags change rarely but are read per scheduled post, so cache the
+# pool in-process for a few minutes instead of scanning the table every call
+_HASHTAG_CACHE_TTL = 300  # seconds
+_hashtag_cache = {'pool': None, 'expires': 0.0}
+
+def _active_hashtags():
+    """Get the active hashtag pool, cached with a short TTL"""
+    now = time.monotonic()
+    if _hashtag_cache['pool'] is None or now >= _hashtag_cache['expires']:
+        # Select only the hashtag column so refreshes move O(count) strings,
+        # not full ORM rows
+        rows = db.session.query(HashtagRepository.hashtag)\
+            .filter_by(is_active=True).all()
+        _hashtag_cache['pool'] = [r[0] for r in rows]
+        _hashtag_cache['expires'] = now + _HASHTAG_CACHE_TTL
+    return _hashtag_cache['pool']
+
+def invalidate_hashtag_cache():
+    """Clear the cached hashtag pool (call after adding/editing hashtags)"""
+    _hashtag_cache['pool'] = None
+
 def get_random_hashtags(count=20):
     """Get random hashtags from repository"""
-    hashtags = HashtagRepository.query.filter_by(is_active=True).all()
-    if len(hashtags) <= count:
-        return [h.hashtag for h in hashtags]
-    return [h.hashtag for h in random.sample(hashtags, count)]
+    pool = _active_hashtags()
+    return random.sample(pool, min(count, len(pool)))
+
+class _SafePlaceholder:
+    """Stand-in for an unknown {placeholder}: formats back to itself, and
+    attribute/index access ({a.b}, {a[0]}) raises instead of silently
+    mangling the text, letting the caller fall back to plain replacement."""
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __format__(self, spec):
+        return '{' + self.key + '}'
+
+    __str__ = __repr__ = lambda self: '{' + self.key + '}'
+
+class _SafeDict(dict):
+    """Leave unknown {placeholders} intact instead of raising KeyError"""
+    def __missing__(self, key):
+        return _SafePlaceholder(key)
+
+# Hour-of-day -> caption time period, one tuple index instead of branching
+_HOUR_PERIOD = ('night',) * 5 + ('morning',) * 7 + ('afternoon',) * 5 \
+    + ('evening',) * 4 + ('night',) * 3
 
 def process_caption_template(template, custom_text="", account_name=""):
     """Process caption template with variables"""
-    now = datetime.now(pytz.timezone('Asia/Kolkata'))
-    
-    # Determine time period
-    hour = now.hour
-    if 5 <= hour < 12:
-        time_period = "morning"
-    elif 12 <= hour < 17:
-        time_period = "afternoon"
-    elif 17 <= hour < 21:
-        time_period = "evening"
-    else:
-        time_period = "night"
-    
-    # Replace variables
-    processed = template.replace('{account_name}', account_name)
-    processed = processed.replace('{date}', now.strftime('%B %d, %Y'))
-    processed = processed.replace('{time}', now.strftime('%I:%M %p'))
-    processed = processed.replace('{day_of_week}', now.strftime('%A'))
-    processed = processed.replace('{time_period}', time_period)
-    processed = processed.replace('{custom_text}', custom_text)
-    
-    return processed
+    now = datetime.now(IST)
+    values = {
+        'account_name': account_name,
+        'date': now.strftime('%B %d, %Y'),
+        'time': now.strftime('%I:%M %p'),
+        'day_of_week': now.strftime('%A'),
+        'time_period': _HOUR_PERIOD[now.hour],
+        'custom_text': custom_text,
+    }
+    try:
+        # Single-pass substitution - templates already use {name} placeholders
+        return template.format_map(_SafeDict(values))
+    except (ValueError, AttributeError, TypeError, IndexError, KeyError):
+        # Captions are free-form text: unmatched braces ("100% done }") raise
+        # ValueError, and {a.b}/{a[x]} apply attribute/index access to the
+        # placeholder string _SafeDict returns. Fall back to plain replacement
+        for key, val in values.items():
+            template = template.replace('{' + key + '}', str(val))
+        return template
 
 # Background job for posting
 def execute_scheduled_post(post_id):
     """Execute a scheduled post"""
     with app.app_context():
-        post = Post.query.get(post_id)
+        # Fetch the post and its account in one round-trip instead of two
+        # .get() calls - several jobs can fire in the same scheduler tick
+        post = Post.query.options(joinedload(Post.account))\
+            .filter_by(id=post_id).first()
         if not post or post.status != 'scheduled':
             return
-        
+
         try:
-            # Get account info
-            account = Account.query.get(post.account_id)
+            account = post.account
             if not account or not account.is_active:
                 post.status = 'failed'
                 post.error_message = 'Account not found or inactive'
                 db.session.commit()
                 return
             
-            # Get media URLs
-            media_urls = json.loads(post.media_urls) if post.media_urls else []
+            # Get media URLs - JSON column decodes on load
+            media_urls = post.media_urls or []
             if not media_urls:
                 post.status = 'failed'
                 post.error_message = 'No media URLs found'
@@ -870,24 +1197,53 @@ def execute_scheduled_post(post_id):
         post.updated_at = datetime.utcnow()
         db.session.commit()
 
+def init_scheduler():
+    """Re-register pending scheduled posts with APScheduler on startup.
+
+    One bulk query pulls just (id, scheduled_time) for every future
+    scheduled post instead of N per-post lookups; replace_existing makes
+    this idempotent against jobs already in the persistent jobstore.
+    """
+    with app.app_context():
+        due = Post.query.with_entities(Post.id, Post.scheduled_time)\
+            .filter(Post.status == 'scheduled',
+                    Post.scheduled_time > datetime.utcnow()).all()
+        for post_id, run_date in due:
+            scheduler.add_job(
+                func=execute_scheduled_post,
+                trigger=DateTrigger(run_date=run_date),
+                args=[post_id],
+                id=f'post_{post_id}',
+                replace_existing=True
+            )
+        if due:
+            logger.info("Re-registered %d scheduled posts", len(due))
+
 # Routes
 @app.route('/')
 def index():
     """Main dashboard"""
     accounts = Account.query.filter_by(is_active=True).all()
-    recent_posts = Post.query.order_by(Post.created_at.desc()).limit(10).all()
-    
-    # Quick stats
-    total_posts = Post.query.count()
-    successful_posts = Post.query.filter_by(status='posted').count()
-    failed_posts = Post.query.filter_by(status='failed').count()
-    pending_posts = Post.query.filter_by(status='scheduled').count()
-    
+    # joinedload the account backref so rendering post.account.username
+    # doesn't issue one SELECT per post; load_only keeps the media/hashtag
+    # JSON blobs out of a view that only shows caption and status
+    recent_posts = Post.query.options(
+        joinedload(Post.account),
+        load_only(Post.caption, Post.status, Post.created_at))\
+        .order_by(Post.created_at.desc()).limit(10).all()
+
+    # Quick stats - one grouped aggregate instead of four COUNT queries
+    status_counts = dict(
+        db.session.query(Post.status, db.func.count()).group_by(Post.status).all()
+    )
+    total_posts = sum(status_counts.values())
+    successful_posts = status_counts.get('posted', 0)
+
     stats = {
         'total_posts': total_posts,
         'successful_posts': successful_posts,
-        'failed_posts': failed_posts,
-        'pending_posts': pending_posts,
+        'failed_posts': status_counts.get('failed', 0),
+        'pending_posts': status_counts.get('scheduled', 0),
         'success_rate': round((successful_posts / total_posts * 100) if total_posts > 0 else 0, 1)
     }
     
@@ -917,15 +1273,9 @@ def add_account():
             flash('All required fields must be filled out', 'error')
             return render_template('add_account.html')
         
-        # Check if account already exists
-        existing_account = Account.query.filter(
-            (Account.username == username) | (Account.instagram_id == instagram_id)
-        ).first()
-        
-        if existing_account:
-            flash('An account with this username or Instagram ID already exists', 'error')
-            return render_template('add_account.html')
-        
+        # Duplicates are caught by the UNIQUE constraints on username and
+        # instagram_id at commit time - no pre-flight SELECT needed
+
         # Check if this is a test account (for development/testing)
         is_test_account = (username.startswith('test_') or 
                           instagram_id.startswith('test') or 
@@ -938,21 +1288,28 @@ def add_account():
                 instagram_id=instagram_id,
                 access_token=access_token,
                 niche=niche,
-                account_type='business'
-            )
-            
-            db.session.add(account)
-            db.session.commit()
-            
-            # Create default posting schedule
-            schedule = PostingSchedule(
-                account_id=account.id,
-                time_slot_1=datetime.strptime('13:00', '%H:%M').time(),  # 1 PM
-                time_slot_2=datetime.strptime('22:00', '%H:%M').time()   # 10 PM
+                account_type='business',
+                is_test=True
             )
-            db.session.add(schedule)
-            db.session.commit()
             
+            # flush() populates account.id without a second commit, so the
+            # account and its default schedule land in one transaction
+            try:
+                db.session.add(account)
+                db.session.flush()
+
+                schedule = PostingSchedule(
+                    account_id=account.id,
+                    time_slot_1=DEFAULT_SLOT_1,
+                    time_slot_2=DEFAULT_SLOT_2
+                )
+                db.session.add(schedule)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                flash('An account with this username or Instagram ID already exists', 'error')
+                return render_template('add_account.html')
+
             flash(f'Test account @{username} added successfully! (Test mode - no API validation)', 'success')
             return redirect(url_for('accounts'))
         
@@ -964,40 +1321,49 @@ def add_account():
                 flash('Unable to connect to Instagram API. Please try again later.', 'error')
                 return render_template('add_account.html')
             
-            if 'error' in account_info:
-                flash(f'Instagram API Error: {account_info["error"]}', 'error')
+            # Destructure the API response once; everything below uses locals
+            api_error = account_info.get('error')
+            returned_id = account_info.get('id')
+            instagram_username = account_info.get('username') or username
+            account_type = account_info.get('account_type') or 'business'
+
+            if api_error:
+                flash(f'Instagram API Error: {api_error}', 'error')
                 return render_template('add_account.html')
-            
+
             # Verify the account ID matches what Instagram returns
-            if account_info.get('id') != instagram_id:
-                flash(f'Account ID mismatch. Instagram returned ID: {account_info.get("id", "unknown")}', 'error')
+            if returned_id != instagram_id:
+                flash(f'Account ID mismatch. Instagram returned ID: {returned_id or "unknown"}', 'error')
                 return render_template('add_account.html')
-            
-            # Use the username from Instagram if available, otherwise use provided username
-            instagram_username = account_info.get('username', username)
-            
+
             # Create account
             account = Account(
                 username=instagram_username,
                 instagram_id=instagram_id,
                 access_token=access_token,
                 niche=niche,
-                account_type=account_info.get('account_type', 'business')
-            )
-            
-            db.session.add(account)
-            db.session.commit()
-            
-            # Create default posting schedule
-            schedule = PostingSchedule(
-                account_id=account.id,
-                time_slot_1=datetime.strptime('13:00', '%H:%M').time(),  # 1 PM
-                time_slot_2=datetime.strptime('22:00', '%H:%M').time()   # 10 PM
+                account_type=account_type,
+                is_test=False
             )
-            db.session.add(schedule)
-            db.session.commit()
             
-            flash(f'Account @{instagram_username} added successfully! Account type: {account_info.get("account_type", "business")}', 'success')
+            # One transaction for the account plus its default schedule
+            try:
+                db.session.add(account)
+                db.session.flush()
+
+                schedule = PostingSchedule(
+                    account_id=account.id,
+                    time_slot_1=DEFAULT_SLOT_1,
+                    time_slot_2=DEFAULT_SLOT_2
+                )
+                db.session.add(schedule)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                flash('An account with this username or Instagram ID already exists', 'error')
+                return render_template('add_account.html')
+
+            flash(f'Account @{instagram_username} added successfully! Account type: {account_type}', 'success')
             return redirect(url_for('accounts'))
             
         except Exception as e:
@@ -1036,21 +1402,29 @@ def upload_multi():
                     flash('Please select images for carousel', 'error')
                     return redirect(url_for('upload_multi'))
                     
-                # Save carousel images
-                for file in files[:10]:  # Max 10 images
-                    if file and file.filename:
-                        filename = secure_filename(file.filename)
-                        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                        file.save(file_path)
-                        
-                        # Upload to GCS or use local URL
-                        if gcs.is_available():
-                            with open(file_path, 'rb') as f:
-                                public_url, _ = gcs.upload_file(f, filename, file.content_type)
-                                if public_url:
-                                    media_urls.append(public_url)
-                        else:
-                            media_urls.append(f"http://localhost:5555/uploads/{filename}")
+                # Save carousel images. Each file's hash+save+GCS upload is
+                # independent disk/network I/O, so fan out across a small
+                # pool; ex.map keeps results in submission order so the
+                # carousel preserves the user's image ordering.
+                def save_and_upload(file):
+                    filename = hashed_upload_filename(file)
+                    # Stream straight to GCS; the local copy is only written
+                    # when the localhost URL is what Instagram will fetch
+                    if gcs.is_available():
+                        public_url, _ = gcs.upload_file(file.stream, filename, file.content_type)
+                        if public_url:
+                            return public_url
+                    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                    file.stream.seek(0)
+                    file.save(file_path, buffer_size=_SAVE_BUFFER)
+                    return f"http://localhost:5555/uploads/{filename}"
+
+                carousel_files = [f for f in files[:10] if f and f.filename]  # Max 10 images
+                if carousel_files:
+                    with ThreadPoolExecutor(max_workers=min(8, len(carousel_files))) as executor:
+                        for public_url in executor.map(save_and_upload, carousel_files):
+                            if public_url:
+                                media_urls.append(public_url)
             else:
                 # Single image upload
                 file = request.files.get('file')
@@ -1058,17 +1432,19 @@ def upload_multi():
                     flash('Please select an image', 'error')
                     return redirect(url_for('upload_multi'))
                 
-                filename = secure_filename(file.filename)
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
-                
-                # Upload to GCS or use local URL
+                filename = hashed_upload_filename(file)
+
+                # Stream to GCS directly, or save locally when the localhost
+                # URL is what Instagram will fetch
+                public_url = None
                 if gcs.is_available():
-                    with open(file_path, 'rb') as f:
-                        public_url, _ = gcs.upload_file(f, filename, file.content_type)
-                        if public_url:
-                            media_urls.append(public_url)
+                    public_url, _ = gcs.upload_file(file.stream, filename, file.content_type)
+                if public_url:
+                    media_urls.append(public_url)
                 else:
+                    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                    file.stream.seek(0)
+                    file.save(file_path, buffer_size=_SAVE_BUFFER)
                     media_urls.append(f"http://localhost:5555/uploads/{filename}")
             
             # Process caption
@@ -1079,27 +1455,35 @@ def upload_multi():
             created_posts = []
             base_time = datetime.utcnow()
             stagger_interval = int(request.form.get('stagger_interval', 60)) if schedule_type == 'stagger' else 0
-            
+
+            # One IN query for the selected accounts; their schedules come
+            # along in a single batched query (lazy='selectin'), instead of
+            # one Account.get plus one schedule lookup per account
+            accounts_by_id = {
+                str(a.id): a
+                for a in Account.query.filter(Account.id.in_(account_ids)).all()
+            }
+
             for idx, account_id in enumerate(account_ids):
-                account = Account.query.get(account_id)
+                account = accounts_by_id.get(str(account_id))
                 if not account:
                     continue
-                
+
                 # Process caption for this account
                 if caption_template:
                     caption = process_caption_template(caption_template, custom_text, account.username)
                 else:
                     caption = custom_text
-                
+
                 # Caption should only contain what the user specifies - no automatic hashtags
-                
+
                 # Calculate scheduled time
                 if schedule_type == 'now':
                     scheduled_time = base_time
                 elif schedule_type == 'stagger':
                     scheduled_time = base_time + timedelta(minutes=stagger_interval * idx)
                 else:  # next_slot
-                    schedule = PostingSchedule.query.filter_by(account_id=account_id, is_active=True).first()
+                    schedule = next((s for s in account.schedule if s.is_active), None)
                     if schedule:
                         scheduled_time = calculate_next_slot(schedule)
                     else:
@@ -1110,7 +1494,7 @@ def upload_multi():
                     account_id=account_id,
                     content_type=post_type if post_type != 'feed' else 'image',
                     caption=caption,
-                    media_urls=json.dumps(media_urls),
+                    media_urls=media_urls,
                     scheduled_time=scheduled_time
                 )
                 
@@ -1119,18 +1503,18 @@ def upload_multi():
             
             db.session.commit()
             
-            # Schedule posts
+            # Schedule posts. 'now' runs through the scheduler too so the
+            # Instagram round-trips happen on a worker thread instead of
+            # blocking this request.
             for post in created_posts:
-                if schedule_type == 'now':
-                    execute_scheduled_post(post.id)
-                else:
-                    scheduler.add_job(
-                        func=execute_scheduled_post,
-                        trigger=DateTrigger(run_date=post.scheduled_time),
-                        args=[post.id],
-                        id=f'post_{post.id}',
-                        replace_existing=True
-                    )
+                run_date = datetime.utcnow() if schedule_type == 'now' else post.scheduled_time
+                scheduler.add_job(
+                    func=execute_scheduled_post,
+                    trigger=DateTrigger(run_date=run_date),
+                    args=[post.id],
+                    id=f'post_{post.id}',
+                    replace_existing=True
+                )
             
             if len(created_posts) == 1:
                 flash(f'Post scheduled successfully!', 'success')
@@ -1144,18 +1528,33 @@ def upload_multi():
             return redirect(url_for('upload_multi'))
     
     # GET request
-    accounts = Account.query.filter_by(is_active=True).all()
-    templates = CaptionTemplate.query.filter_by(is_active=True).all()
+    accounts, templates = _upload_form_context()
     return render_template('upload_multi.html', accounts=accounts, templates=templates)
 
+def _upload_form_context():
+    """Active accounts and caption templates for the upload forms.
+
+    Cached on flask.g so the validation-failure branches don't re-run the
+    same two queries several times within one request.
+    """
+    if 'upload_form_context' not in g:
+        g.upload_form_context = (
+            Account.query.filter_by(is_active=True).all(),
+            CaptionTemplate.query.filter_by(is_active=True).all()
+        )
+    return g.upload_form_context
+
 def calculate_next_slot(schedule):
     """Calculate next available time slot for posting"""
-    now = datetime.now(pytz.timezone(schedule.timezone))
-    
+    # One timezone lookup per call - IST is by far the common case and is
+    # already built at import
+    tz = IST if schedule.timezone == 'Asia/Kolkata' else pytz.timezone(schedule.timezone)
+    now = datetime.now(tz)
+
     # Check if we can post today
     slot1_today = datetime.combine(now.date(), schedule.time_slot_1)
     slot2_today = datetime.combine(now.date(), schedule.time_slot_2)
-    
+
     if now.time() < schedule.time_slot_1:
         scheduled_time = calculate_post_time(slot1_today, schedule.variance_minutes)
     elif now.time() < schedule.time_slot_2:
@@ -1165,9 +1564,8 @@ def calculate_next_slot(schedule):
         tomorrow = now.date() + timedelta(days=1)
         slot1_tomorrow = datetime.combine(tomorrow, schedule.time_slot_1)
         scheduled_time = calculate_post_time(slot1_tomorrow, schedule.variance_minutes)
-    
+
     # Convert to UTC
-    tz = pytz.timezone(schedule.timezone)
     return tz.localize(scheduled_time).astimezone(pytz.UTC).replace(tzinfo=None)
 
 @app.route('/upload', methods=['GET', 'POST'])
@@ -1176,24 +1574,10 @@ def upload():
     if request.method == 'POST':
         try:
             # Debug logging
-            print(f"Upload POST request received")
-            print(f"Content-Type: {request.content_type}")
-            print(f"Content-Length: {request.content_length}")
-            print(f"Form data: {dict(request.form)}")
-            print(f"Files in request: {list(request.files.keys())}")
-            
-            # Additional debugging for file upload
-            if 'file' in request.files:
-                file_obj = request.files['file']
-                print(f"File object found: {file_obj}")
-                print(f"File filename: {file_obj.filename}")
-                print(f"File content type: {file_obj.content_type}")
-                print(f"File has content: {bool(file_obj.filename)}")
-            else:
-                print("No 'file' key in request.files")
-                print(f"All files keys: {list(request.files.keys())}")
-                print(f"Raw form data: {request.form}")
-                
+            logger.debug("Upload POST: content_type=%s length=%s form=%s files=%s",
+                         request.content_type, request.content_length,
+                         request.form, list(request.files.keys()))
+
             # Get form data with validation
             account_id = request.form.get('account_id')
             caption_template = request.form.get('caption_template', '')
@@ -1204,101 +1588,93 @@ def upload():
             if not account_id:
                 flash('Please select an Instagram account', 'error')
                 # Return to form with existing accounts and templates
-                accounts = Account.query.filter_by(is_active=True).all()
-                templates = CaptionTemplate.query.filter_by(is_active=True).all()
+                accounts, templates = _upload_form_context()
                 return render_template('upload.html', accounts=accounts, templates=templates)
             
             # Validate caption content
             if not custom_text.strip() and not caption_template:
                 flash('Please enter caption text or select a template', 'error')
-                accounts = Account.query.filter_by(is_active=True).all()
-                templates = CaptionTemplate.query.filter_by(is_active=True).all()
+                accounts, templates = _upload_form_context()
                 return render_template('upload.html', accounts=accounts, templates=templates)
             
             # Handle file upload with detailed error messages
             if 'file' not in request.files:
                 flash('No file was uploaded. Please select an image file.', 'error')
-                print("Error: 'file' not in request.files")
-                accounts = Account.query.filter_by(is_active=True).all()
-                templates = CaptionTemplate.query.filter_by(is_active=True).all()
+                logger.debug("'file' not in request.files")
+                accounts, templates = _upload_form_context()
                 return render_template('upload.html', accounts=accounts, templates=templates)
             
             file = request.files['file']
-            print(f"File object: {file}")
-            print(f"File filename: {file.filename}")
-            print(f"File content type: {file.content_type}")
-            
+            logger.debug("File: %s (content_type=%s)", file.filename, file.content_type)
+
             if not file or file.filename == '':
                 flash('No file was selected. Please choose an image file.', 'error')
-                print("Error: File is empty or no filename")
-                accounts = Account.query.filter_by(is_active=True).all()
-                templates = CaptionTemplate.query.filter_by(is_active=True).all()
+                logger.debug("File is empty or has no filename")
+                accounts, templates = _upload_form_context()
                 return render_template('upload.html', accounts=accounts, templates=templates)
             
             if file:
-                # Save file
-                filename = secure_filename(file.filename)
+                filename = hashed_upload_filename(file)
                 file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
-                
-                # Log the URL issue for debugging
-                print(f"\n=== FILE UPLOAD DEBUG ===")
-                print(f"Saved file: {filename}")
-                print(f"File path: {file_path}")
-                
-                # Check if we're using a test account or real account
-                account = Account.query.get(account_id)
+
+                # Check if we're using a test account or real account.
+                # joinedload the schedule collection so the next_slot branch
+                # below doesn't need its own SELECT.
+                account = Account.query.options(joinedload(Account.schedule))\
+                    .filter_by(id=account_id).first()
                 if not account:
                     flash('Account not found', 'error')
-                    accounts = Account.query.filter_by(is_active=True).all()
-                    templates = CaptionTemplate.query.filter_by(is_active=True).all()
+                    accounts, templates = _upload_form_context()
                     return render_template('upload.html', accounts=accounts, templates=templates)
-                
-                is_test_account = account.access_token.startswith('test')
-                
+
+                is_test_account = account.is_test
+
                 if is_test_account:
-                    # For test accounts, use localhost URL (will be handled by test account logic)
+                    # Test accounts serve from the local uploads folder
+                    file.save(file_path, buffer_size=_SAVE_BUFFER)
                     image_url = f"http://localhost:5555/uploads/{filename}"
-                    print(f"Test account detected - using localhost URL: {image_url}")
+                    logger.debug("Test account detected - using localhost URL: %s", image_url)
                 else:
                     # For real accounts, try Google Cloud Storage first, then ngrok
-                    print(f"Real Instagram account detected: @{account.username}")
-                    print(f"Account token: {account.access_token[:20]}...")
-                    
+                    logger.debug("Real Instagram account detected: @%s", account.username)
+
                     image_url = None
                     upload_method = None
-                    
-                    # Option 1: Try Google Cloud Storage
+
+                    # Option 1: Stream the request body straight to GCS -
+                    # no intermediate disk write and re-read
                     if gcs.is_available():
-                        print(f"Attempting upload to Google Cloud Storage...")
-                        
-                        # Re-open the file for GCS upload
+                        logger.debug("Attempting upload to Google Cloud Storage...")
+
                         try:
-                            with open(file_path, 'rb') as gcs_file:
-                                public_url, gcs_error = gcs.upload_file(
-                                    gcs_file, 
-                                    filename, 
-                                    file.content_type
-                                )
-                                
+                            public_url, gcs_error = gcs.upload_file(
+                                file.stream,
+                                filename,
+                                file.content_type
+                            )
+
                             if public_url:
                                 image_url = public_url
                                 upload_method = "Google Cloud Storage"
-                                print(f"✅ SUCCESS: Using GCS URL: {image_url}")
+                                logger.debug("Using GCS URL: %s", image_url)
                             else:
-                                print(f"❌ GCS upload failed: {gcs_error}")
-                                
+                                logger.warning("GCS upload failed: %s", gcs_error)
+
                         except Exception as e:
-                            print(f"❌ GCS upload error: {e}")
-                    
-                    # Option 2: Fallback to ngrok if GCS is not available
+                            logger.warning("GCS upload error: %s", e)
+
+                    # Option 2: Fallback to ngrok if GCS is not available.
+                    # ngrok serves /uploads/<filename>, so this path needs
+                    # the file on local disk.
                     if not image_url:
-                        print(f"Trying ngrok fallback...")
+                        logger.debug("Trying ngrok fallback...")
                         ngrok_url = detect_ngrok_url()
                         if ngrok_url:
+                            file.stream.seek(0)
+                            file.save(file_path, buffer_size=_SAVE_BUFFER)
                             image_url = f"{ngrok_url}/uploads/{filename}"
                             upload_method = "ngrok"
-                            print(f"✅ SUCCESS: Using ngrok URL: {image_url}")
+                            logger.debug("Using ngrok URL: %s", image_url)
                     
                     # Option 3: No public URL available - provide helpful error
                     if not image_url:
@@ -1340,13 +1716,12 @@ Current account: @{account.username} (Real Instagram account)
                         """
                         
                         flash(error_msg, 'error')
-                        accounts = Account.query.filter_by(is_active=True).all()
-                        templates = CaptionTemplate.query.filter_by(is_active=True).all()
+                        accounts, templates = _upload_form_context()
                         return render_template('upload.html', accounts=accounts, templates=templates)
                     
-                    print(f"✅ Using {upload_method} for image hosting")
-                
-                print(f"Final image URL: {image_url}")
+                    logger.debug("Using %s for image hosting", upload_method)
+
+                logger.debug("Final image URL: %s", image_url)
                 
                 # Account was already retrieved above - no need to get it again
                 
@@ -1362,27 +1737,12 @@ Current account: @{account.username} (Real Instagram account)
                 if schedule_type == 'now':
                     scheduled_time = datetime.utcnow()
                 elif schedule_type == 'next_slot':
-                    # Get next available time slot
-                    now = datetime.now(pytz.timezone('Asia/Kolkata'))
-                    schedule = PostingSchedule.query.filter_by(account_id=account_id, is_active=True).first()
+                    # Next available slot from the eager-loaded schedules,
+                    # sharing calculate_next_slot instead of duplicating the
+                    # timezone math inline
+                    schedule = next((s for s in account.schedule if s.is_active), None)
                     if schedule:
-                        # Check if we can post today
-                        slot1_today = datetime.combine(now.date(), schedule.time_slot_1)
-                        slot2_today = datetime.combine(now.date(), schedule.time_slot_2)
-                        
-                        if now.time() < schedule.time_slot_1:
-                            scheduled_time = calculate_post_time(slot1_today, schedule.variance_minutes)
-                        elif now.time() < schedule.time_slot_2:
-                            scheduled_time = calculate_post_time(slot2_today, schedule.variance_minutes)
-                        else:
-                            # Post tomorrow morning
-                            tomorrow = now.date() + timedelta(days=1)
-                            slot1_tomorrow = datetime.combine(tomorrow, schedule.time_slot_1)
-                            scheduled_time = calculate_post_time(slot1_tomorrow, schedule.variance_minutes)
-                        
-                        # Convert to UTC
-                        ist = pytz.timezone('Asia/Kolkata')
-                        scheduled_time = ist.localize(scheduled_time).astimezone(pytz.UTC).replace(tzinfo=None)
+                        scheduled_time = calculate_next_slot(schedule)
                     else:
                         scheduled_time = datetime.utcnow()
                 else:
@@ -1396,26 +1756,23 @@ Current account: @{account.username} (Real Instagram account)
                     account_id=account_id,
                     content_type='reel' if is_video else 'image',
                     caption=caption,
-                    media_urls=json.dumps([image_url]),
+                    media_urls=[image_url],
                     scheduled_time=scheduled_time
                 )
                 
                 db.session.add(post)
                 db.session.commit()
                 
-                # Schedule the post
-                if schedule_type == 'now':
-                    # Execute immediately
-                    execute_scheduled_post(post.id)
-                else:
-                    # Schedule for later
-                    scheduler.add_job(
-                        func=execute_scheduled_post,
-                        trigger=DateTrigger(run_date=scheduled_time),
-                        args=[post.id],
-                        id=f'post_{post.id}',
-                        replace_existing=True
-                    )
+                # Schedule the post; 'now' is dispatched from the scheduler's
+                # worker pool so the response isn't blocked on the publish
+                run_date = datetime.utcnow() if schedule_type == 'now' else scheduled_time
+                scheduler.add_job(
+                    func=execute_scheduled_post,
+                    trigger=DateTrigger(run_date=run_date),
+                    args=[post.id],
+                    id=f'post_{post.id}',
+                    replace_existing=True
+                )
                 
                 flash('Post scheduled successfully!', 'success')
                 return redirect(url_for('posts'))
@@ -1425,157 +1782,181 @@ Current account: @{account.username} (Real Instagram account)
             return redirect(url_for('upload'))
     
     # GET request - show upload form
-    accounts = Account.query.filter_by(is_active=True).all()
-    templates = CaptionTemplate.query.filter_by(is_active=True).all()
-    
+    accounts, templates = _upload_form_context()
+
     return render_template('upload.html', accounts=accounts, templates=templates)
 
 @app.route('/posts')
 def posts():
     """View all posts"""
-    posts = Post.query.order_by(Post.created_at.desc()).all()
-    return render_template('posts.html', posts=posts)
+    page = request.args.get('page', 1, type=int)
+    # selectinload fetches all referenced accounts in one extra query, and
+    # pagination caps memory regardless of how large the posts table grows
+    pagination = Post.query.options(selectinload(Post.account))\
+        .order_by(Post.created_at.desc())\
+        .paginate(page=page, per_page=50, error_out=False)
+    return render_template('posts.html', posts=pagination.items, pagination=pagination)
 
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
-    """Serve uploaded files"""
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    """Serve uploaded files with conditional caching.
+
+    Filenames are content-addressed, so a long max_age is safe and
+    Instagram's fetcher can revalidate with If-None-Match / 304 instead
+    of re-downloading on every retry.
+    """
+    return send_from_directory(app.config['UPLOAD_FOLDER'], filename,
+                               conditional=True, max_age=86400)
 
 from flask import send_from_directory
 
-@app.route('/test_api')
-def test_api():
-    """Test route to check Instagram API functionality"""
-    try:
-        # Test basic API connectivity
-        test_token = os.getenv('INSTAGRAM_ACCESS_TOKEN')
+# Debug-only routes, off unless local dev opts in with ENABLE_TEST_ROUTES=1.
+# Kept out of the routing map by default because /test_instagram_api fires
+# live Graph API calls - production must not expose that by accident.
+TEST_ROUTES_ENABLED = os.getenv('ENABLE_TEST_ROUTES', '').lower() in ('1', 'true', 'yes')
+
+if TEST_ROUTES_ENABLED:
+    @app.route('/test_api')
+    def test_api():
+        """Test route to check Instagram API functionality"""
+        try:
+            # Test basic API connectivity
+            test_token = os.getenv('INSTAGRAM_ACCESS_TOKEN')
         
-        if not test_token:
-            return jsonify({
-                "status": "error",
-                "message": "No Instagram access token found in environment variables"
-            })
+            if not test_token:
+                return jsonify({
+                    "status": "error",
+                    "message": "No Instagram access token found in environment variables"
+                })
         
-        # Test token validation
-        token_valid, token_msg = instagram_api.validate_access_token(test_token)
+            # Test token validation
+            token_valid, token_msg = instagram_api.validate_access_token(test_token)
         
-        return jsonify({
-            "status": "success",
-            "instagram_api": "available",
-            "token_validation": {
-                "valid": token_valid,
-                "message": token_msg
-            },
-            "base_url": instagram_api.base_url,
-            "message": "Instagram API integration is working"
-        })
+            return jsonify({
+                "status": "success",
+                "instagram_api": "available",
+                "token_validation": {
+                    "valid": token_valid,
+                    "message": token_msg
+                },
+                "base_url": instagram_api.base_url,
+                "message": "Instagram API integration is working"
+            })
         
-    except Exception as e:
-        return jsonify({
-            "status": "error",
-            "message": f"Error testing API: {str(e)}"
-        })
+        except Exception as e:
+            return jsonify({
+                "status": "error",
+                "message": f"Error testing API: {str(e)}"
+            })
 
-@app.route('/test_upload', methods=['GET', 'POST'])
-def test_upload():
-    """Test route for debugging file upload issues"""
-    if request.method == 'POST':
-        debug_info = {
-            "form_data": dict(request.form),
-            "files_keys": list(request.files.keys()),
-            "content_type": request.content_type,
-            "content_length": request.content_length
-        }
-        
-        if 'file' in request.files:
-            file = request.files['file']
-            debug_info["file_info"] = {
-                "filename": file.filename,
-                "content_type": file.content_type,
-                "has_content": bool(file.filename)
+    @app.route('/test_upload', methods=['GET', 'POST'])
+    def test_upload():
+        """Test route for debugging file upload issues"""
+        if request.method == 'POST':
+            debug_info = {
+                "form_data": dict(request.form),
+                "files_keys": list(request.files.keys()),
+                "content_type": request.content_type,
+                "content_length": request.content_length
             }
         
-        return jsonify({
-            "status": "success",
-            "message": "File upload test completed",
-            "debug_info": debug_info
-        })
-    
-    return '''
-    <html>
-    <body>
-        <h2>File Upload Test</h2>
-        <form method="POST" enctype="multipart/form-data">
-            <input type="file" name="file" accept="image/*" required><br><br>
-            <input type="text" name="test_field" placeholder="Test field"><br><br>
-            <button type="submit">Test Upload</button>
-        </form>
-    </body>
-    </html>
-    '''
-
-@app.route('/test_instagram_api', methods=['GET', 'POST'])
-def test_instagram_api():
-    """Test Instagram API with public image URL"""
-    if request.method == 'POST':
-        # Test with a public image URL to validate API request structure
-        test_image_url = "https://images.unsplash.com/photo-1501594907352-04cda38ebc29?w=800&h=800&fit=crop"
-        test_caption = "Test post from Instagram automation tool"
+            if 'file' in request.files:
+                file = request.files['file']
+                debug_info["file_info"] = {
+                    "filename": file.filename,
+                    "content_type": file.content_type,
+                    "has_content": bool(file.filename)
+                }
         
-        # Get test account
-        test_account = Account.query.filter(Account.username.like('%test%')).first()
-        if not test_account:
             return jsonify({
-                "status": "error",
-                "message": "No test account found. Please create a test account first."
+                "status": "success",
+                "message": "File upload test completed",
+                "debug_info": debug_info
             })
+    
+        return '''
+        <html>
+        <body>
+            <h2>File Upload Test</h2>
+            <form method="POST" enctype="multipart/form-data">
+                <input type="file" name="file" accept="image/*" required><br><br>
+                <input type="text" name="test_field" placeholder="Test field"><br><br>
+                <button type="submit">Test Upload</button>
+            </form>
+        </body>
+        </html>
+        '''
+
+    @app.route('/test_instagram_api', methods=['GET', 'POST'])
+    def test_instagram_api():
+        """Test Instagram API with public image URL"""
+        if request.method == 'POST':
+            # Test with a public image URL to validate API request structure
+            test_image_url = "https://images.unsplash.com/photo-1501594907352-04cda38ebc29?w=800&h=800&fit=crop"
+            test_caption = "Test post from Instagram automation tool"
         
-        print(f"\n=== TESTING INSTAGRAM API WITH PUBLIC IMAGE ===")
-        print(f"Test account: {test_account.username}")
-        print(f"Test image URL: {test_image_url}")
+            # Get test account
+            test_account = Account.query.filter(Account.username.like('%test%')).first()
+            if not test_account:
+                return jsonify({
+                    "status": "error",
+                    "message": "No test account found. Please create a test account first."
+                })
         
-        # Test the API call
-        result = instagram_api.upload_media(
-            test_account.instagram_id,
-            test_image_url,
-            test_caption,
-            test_account.access_token
-        )
+            print(f"\n=== TESTING INSTAGRAM API WITH PUBLIC IMAGE ===")
+            print(f"Test account: {test_account.username}")
+            print(f"Test image URL: {test_image_url}")
         
-        return jsonify({
-            "status": "success" if 'id' in result else "error",
-            "message": "API test completed",
-            "result": result,
-            "account_used": test_account.username
-        })
+            # Test the API call
+            result = instagram_api.upload_media(
+                test_account.instagram_id,
+                test_image_url,
+                test_caption,
+                test_account.access_token
+            )
+        
+            return jsonify({
+                "status": "success" if 'id' in result else "error",
+                "message": "API test completed",
+                "result": result,
+                "account_used": test_account.username
+            })
     
-    return '''
-    <html>
-    <body>
-        <h2>Instagram API Test</h2>
-        <p>This will test the Instagram API using a public image URL to validate the request structure.</p>
-        <form method="POST">
-            <button type="submit">Test Instagram API</button>
-        </form>
-        <br>
-        <p><strong>Note:</strong> This test uses a public image URL from Unsplash to validate that our API request structure is correct.</p>
-    </body>
-    </html>
-    '''
+        return '''
+        <html>
+        <body>
+            <h2>Instagram API Test</h2>
+            <p>This will test the Instagram API using a public image URL to validate the request structure.</p>
+            <form method="POST">
+                <button type="submit">Test Instagram API</button>
+            </form>
+            <br>
+            <p><strong>Note:</strong> This test uses a public image URL from Unsplash to validate that our API request structure is correct.</p>
+        </body>
+        </html>
+        '''
 
 @app.route('/api/accounts')
 def api_accounts():
     """API endpoint to get all accounts with stats"""
     accounts = Account.query.all()
     account_data = []
-    
+
+    # One grouped aggregate for every account instead of four COUNT
+    # queries per account (N+1)
+    status_counts = {}
+    for account_id, status, count in db.session.query(
+            Post.account_id, Post.status, db.func.count()).group_by(
+            Post.account_id, Post.status):
+        status_counts.setdefault(account_id, {})[status] = count
+
     for account in accounts:
-        # Get post stats
-        total_posts = Post.query.filter_by(account_id=account.id).count()
-        successful_posts = Post.query.filter_by(account_id=account.id, status='posted').count()
-        scheduled_posts = Post.query.filter_by(account_id=account.id, status='scheduled').count()
-        failed_posts = Post.query.filter_by(account_id=account.id, status='failed').count()
-        
+        counts = status_counts.get(account.id, {})
+        total_posts = sum(counts.values())
+        successful_posts = counts.get('posted', 0)
+        scheduled_posts = counts.get('scheduled', 0)
+        failed_posts = counts.get('failed', 0)
+
         account_data.append({
             'id': account.id,
             'username': account.username,
@@ -1594,15 +1975,21 @@ def api_accounts():
 def api_dashboard_single(account_id):
     """API endpoint for single account dashboard data"""
     account = Account.query.get_or_404(account_id)
-    
-    # Get post stats
-    total_posts = Post.query.filter_by(account_id=account.id).count()
-    successful_posts = Post.query.filter_by(account_id=account.id, status='posted').count()
-    scheduled_posts = Post.query.filter_by(account_id=account.id, status='scheduled').count()
-    failed_posts = Post.query.filter_by(account_id=account.id, status='failed').count()
-    
-    # Get recent posts
-    recent_posts = Post.query.filter_by(account_id=account.id)\
+
+    # Get post stats - one grouped aggregate instead of four COUNT queries
+    status_counts = dict(
+        db.session.query(Post.status, db.func.count(Post.id))
+        .filter_by(account_id=account.id).group_by(Post.status).all()
+    )
+    total_posts = sum(status_counts.values())
+    successful_posts = status_counts.get('posted', 0)
+    scheduled_posts = status_counts.get('scheduled', 0)
+    failed_posts = status_counts.get('failed', 0)
+
+    # Get recent posts - only the columns the JSON payload includes
+    recent_posts = Post.query.options(
+        load_only(Post.content_type, Post.caption, Post.scheduled_time, Post.status))\
+        .filter_by(account_id=account.id)\
         .order_by(Post.created_at.desc())\
         .limit(10)\
         .all()
@@ -1692,129 +2079,25 @@ def api_bulk_action():
 def setup_help():
     """Help page for setting up public URLs"""
     ngrok_url = detect_ngrok_url()
-    ngrok_status = "✅ DETECTED" if ngrok_url else "❌ NOT DETECTED"
-    
-    # Get GCS status
     gcs_status = gcs.get_status()
-    gcs_overall_status = "✅ READY" if gcs_status['authenticated'] and gcs_status['bucket_exists'] else "❌ NOT READY"
-    
-    accounts = Account.query.all()
-    real_accounts = [acc for acc in accounts if not acc.access_token.startswith('test')]
-    test_accounts = [acc for acc in accounts if acc.access_token.startswith('test')]
-    
-    return f'''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Setup Help - Instagram Automation</title>
-        <style>
-            body {{ font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }}
-            .status {{ padding: 10px; margin: 10px 0; border-radius: 5px; }}
-            .success {{ background-color: #d4edda; border: 1px solid #c3e6cb; }}
-            .warning {{ background-color: #fff3cd; border: 1px solid #ffeaa7; }}
-            .error {{ background-color: #f8d7da; border: 1px solid #f5c6cb; }}
-            .code {{ background-color: #f4f4f4; padding: 10px; border-radius: 5px; font-family: monospace; }}
-            .account {{ margin: 10px 0; padding: 10px; border: 1px solid #ddd; border-radius: 5px; }}
-        </style>
-    </head>
-    <body>
-        <h1>🛠️ Instagram Automation Setup Help</h1>
-        
-                 <h2>📊 Current Status</h2>
-         
-         <div class="status {'success' if gcs_status['authenticated'] and gcs_status['bucket_exists'] else 'error'}">
-             <strong>Google Cloud Storage:</strong> {gcs_overall_status}<br>
-             <strong>Available:</strong> {'✅ Yes' if gcs_status['available'] else '❌ No'}<br>
-             <strong>Authenticated:</strong> {'✅ Yes' if gcs_status['authenticated'] else '❌ No'}<br>
-             <strong>Bucket:</strong> {gcs_status['bucket_name']}<br>
-             <strong>Bucket Exists:</strong> {'✅ Yes' if gcs_status['bucket_exists'] else '❌ No'}<br>
-             <strong>Project ID:</strong> {gcs_status['project_id'] or 'Not configured'}
-         </div>
-         
-         <div class="status {'success' if ngrok_url else 'warning'}">
-             <strong>Ngrok Status:</strong> {ngrok_status}<br>
-             {'<strong>Public URL:</strong> ' + ngrok_url if ngrok_url else 'No ngrok tunnel detected'}
-         </div>
-        
-        <h2>👥 Account Summary</h2>
-        <div class="status {'success' if test_accounts else 'warning'}">
-            <strong>Test Accounts:</strong> {len(test_accounts)}<br>
-            {'✅ Can upload immediately (mock Instagram API)' if test_accounts else '⚠️ No test accounts found'}
-        </div>
-        
-                 <div class="status {'success' if not real_accounts or (gcs_status['authenticated'] and gcs_status['bucket_exists']) or ngrok_url else 'error'}">
-             <strong>Real Instagram Accounts:</strong> {len(real_accounts)}<br>
-             {('✅ Ready to upload (GCS or ngrok available)' if (gcs_status['authenticated'] and gcs_status['bucket_exists']) or ngrok_url else '❌ Require public URL for uploads') if real_accounts else 'ℹ️ No real accounts configured'}
-         </div>
-        
-                 <h2>🚀 Quick Setup Options</h2>
-         
-         <h3>Option 1: Google Cloud Storage (Recommended for Production)</h3>
-         <div class="code">
-             # 1. Create GCS Bucket<br>
-             gcloud auth login<br>
-             gsutil mb gs://{gcs_status['bucket_name']}<br>
-             gsutil iam ch allUsers:objectViewer gs://{gcs_status['bucket_name']}<br><br>
-             
-             # 2. Set up authentication<br>
-             gcloud auth application-default login<br>
-             # OR create service account key and set path in .env<br><br>
-             
-             # 3. Update .env file<br>
-             GCS_PROJECT_ID=your-project-id<br>
-             GCS_BUCKET_NAME={gcs_status['bucket_name']}<br>
-             # GOOGLE_APPLICATION_CREDENTIALS=path/to/key.json (optional)<br><br>
-             
-             # 4. Restart the application<br>
-             # Images will automatically upload to GCS for real accounts
-         </div>
-         
-         <h3>Option 2: Use Test Account (Recommended for Development)</h3>
-        <div class="code">
-            1. Go to Add Account: <a href="/add_account">http://localhost:5555/add_account</a><br>
-            2. Username: test_myaccount<br>
-            3. Instagram ID: test123456<br>
-            4. Access Token: test_token<br>
-            5. Upload works immediately (no real Instagram API calls)
-        </div>
-        
-                 <h3>Option 3: Setup Ngrok (Alternative for Testing)</h3>
-         <div class="code">
-             # Install ngrok<br>
-             brew install ngrok  # Mac<br>
-             # or download from https://ngrok.com<br><br>
-             
-             # Run ngrok in a new terminal<br>
-             ngrok http 5555<br><br>
-             
-             # Copy the https URL (e.g., https://abc123.ngrok.io)<br>
-             # Set environment variable (optional):<br>
-             export NGROK_URL=https://abc123.ngrok.io<br><br>
-             
-             # Restart this app - it will auto-detect ngrok
-         </div>
-        
-        <h2>📋 Troubleshooting</h2>
-        
-        <h3>❌ "Instagram cannot access localhost URLs"</h3>
-        <p><strong>Solution:</strong> Use ngrok or test accounts. Instagram's servers cannot reach your localhost.</p>
-        
-        <h3>❌ "Only photo or video can be accepted as media type"</h3>
-        <p><strong>Cause:</strong> Instagram couldn't fetch the image from the URL.</p>
-        <p><strong>Solution:</strong> Ensure URL is publicly accessible (use ngrok or cloud storage).</p>
-        
-        <h3>❌ "Invalid OAuth access token"</h3>
-        <p><strong>Cause:</strong> Using test token with real Instagram API.</p>
-        <p><strong>Solution:</strong> Use proper Instagram Graph API token or switch to test account.</p>
-        
-        <div style="margin-top: 40px; text-align: center;">
-            <a href="/" style="background-color: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
-                ← Back to Dashboard
-            </a>
-        </div>
-    </body>
-    </html>
-    '''
+
+    # Count test vs real accounts with one indexed aggregate instead of
+    # loading and partitioning every row in Python
+    counts = dict(
+        db.session.query(Account.is_test, db.func.count())
+        .group_by(Account.is_test).all()
+    )
+    test_count = counts.get(True, 0)
+    total_count = sum(counts.values())
+
+    return render_template(
+        'setup_help.html',
+        gcs=gcs_status,
+        gcs_ready=gcs_status['authenticated'] and gcs_status['bucket_exists'],
+        ngrok_url=ngrok_url,
+        test_count=test_count,
+        real_count=(total_count or 0) - test_count
+    )
 
 @app.route('/init_db')
 def init_db():
@@ -1835,9 +2118,10 @@ def init_db():
                 ('comment', 'Engagement'), ('share', 'Engagement'), ('tag', 'Engagement')
             ]
             
-            for hashtag, category in sample_hashtags:
-                tag = HashtagRepository(hashtag=hashtag, category=category)
-                db.session.add(tag)
+            db.session.bulk_insert_mappings(
+                HashtagRepository,
+                [{'hashtag': h, 'category': c} for h, c in sample_hashtags]
+            )
         
         # Add sample caption templates
         if CaptionTemplate.query.count() == 0:
@@ -1859,15 +2143,10 @@ def init_db():
                 }
             ]
             
-            for template_data in sample_templates:
-                template = CaptionTemplate(
-                    name=template_data['name'],
-                    template=template_data['template'],
-                    category=template_data['category']
-                )
-                db.session.add(template)
+            db.session.bulk_insert_mappings(CaptionTemplate, sample_templates)
         
         db.session.commit()
+        invalidate_hashtag_cache()
         flash('Database initialized successfully!', 'success')
         
     except Exception as e:
@@ -1878,4 +2157,11 @@ def init_db():
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
-    app.run(debug=True, port=5555) 
\ No newline at end of file
+    # The debug reloader executes this module in both the supervisor and
+    # the reloaded child. Only the child (WERKZEUG_RUN_MAIN) may start the
+    # scheduler: two processes on the same persistent jobstore would fire
+    # every due post twice.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        scheduler.start()
+        init_scheduler()
+    app.run(debug=True, port=5555)
\ No newline at end of file
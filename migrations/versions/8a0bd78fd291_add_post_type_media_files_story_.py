@@ -19,7 +19,7 @@ depends_on = None
 def upgrade():
     # ### commands auto generated by Alembic - please adjust! ###
     with op.batch_alter_table('posts', schema=None) as batch_op:
-        batch_op.add_column(sa.Column('post_type', sa.String(length=20), nullable=False))
+        batch_op.add_column(sa.Column('post_type', sa.String(length=20), nullable=False, server_default='image'))
         batch_op.add_column(sa.Column('media_files', sa.JSON(), nullable=True))
         batch_op.add_column(sa.Column('story_elements', sa.JSON(), nullable=True))
 
@@ -0,0 +1,142 @@
+"""Add is_test flag, JSON columns, server defaults and query indexes
+
+Revision ID: d41c8f27a5b3
+Revises: 8a0bd78fd291
+Create Date: 2026-08-27 10:42:17.309154
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41c8f27a5b3'
+down_revision = '8a0bd78fd291'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('accounts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_test', sa.Boolean(), nullable=True))
+        batch_op.alter_column('created_at',
+               existing_type=sa.DATETIME(),
+               server_default=sa.text('CURRENT_TIMESTAMP'))
+        batch_op.alter_column('updated_at',
+               existing_type=sa.DATETIME(),
+               server_default=sa.text('CURRENT_TIMESTAMP'))
+        batch_op.create_index('ix_accounts_active', ['is_active'])
+        batch_op.create_index(batch_op.f('ix_accounts_is_test'), ['is_test'])
+
+    # Backfill using the same prefix rules add_account applies to new rows.
+    # The underscore is escaped: unescaped LIKE 'test_%' would treat _ as a
+    # wildcard and flag real usernames like 'tester...' as test accounts.
+    op.execute(
+        "UPDATE accounts SET is_test = ("
+        "username LIKE 'test\\_%' ESCAPE '\\' OR "
+        "instagram_id LIKE 'test%' OR "
+        "access_token LIKE 'test%')"
+    )
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        # Re-dropped: 8a0bd78fd291 re-added these but the Post model no
+        # longer has them
+        batch_op.drop_column('story_elements')
+        batch_op.drop_column('media_files')
+        batch_op.drop_column('post_type')
+        batch_op.alter_column('media_urls',
+               existing_type=sa.TEXT(),
+               type_=sa.JSON(),
+               existing_nullable=True)
+        batch_op.alter_column('hashtags',
+               existing_type=sa.TEXT(),
+               type_=sa.JSON(),
+               existing_nullable=True)
+        batch_op.alter_column('created_at',
+               existing_type=sa.DATETIME(),
+               server_default=sa.text('CURRENT_TIMESTAMP'))
+        batch_op.alter_column('updated_at',
+               existing_type=sa.DATETIME(),
+               server_default=sa.text('CURRENT_TIMESTAMP'))
+        batch_op.create_index('ix_posts_account_created', ['account_id', 'created_at'])
+        batch_op.create_index('ix_posts_account_sched_status', ['account_id', 'scheduled_time', 'status'])
+        batch_op.create_index('ix_posts_created_at', ['created_at'])
+        batch_op.create_index('ix_posts_status', ['status'])
+        batch_op.create_index('ix_posts_status_sched', ['status', 'scheduled_time'])
+
+    with op.batch_alter_table('posting_schedule', schema=None) as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.DATETIME(),
+               server_default=sa.text('CURRENT_TIMESTAMP'))
+
+    with op.batch_alter_table('hashtag_repository', schema=None) as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.DATETIME(),
+               server_default=sa.text('CURRENT_TIMESTAMP'))
+        batch_op.create_index('ix_hashtag_active', ['is_active'])
+
+    with op.batch_alter_table('caption_templates', schema=None) as batch_op:
+        batch_op.alter_column('variables',
+               existing_type=sa.TEXT(),
+               type_=sa.JSON(),
+               existing_nullable=True)
+        batch_op.alter_column('created_at',
+               existing_type=sa.DATETIME(),
+               server_default=sa.text('CURRENT_TIMESTAMP'))
+
+
+def downgrade():
+    with op.batch_alter_table('caption_templates', schema=None) as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.DATETIME(),
+               server_default=None)
+        batch_op.alter_column('variables',
+               existing_type=sa.JSON(),
+               type_=sa.TEXT(),
+               existing_nullable=True)
+
+    with op.batch_alter_table('hashtag_repository', schema=None) as batch_op:
+        batch_op.drop_index('ix_hashtag_active')
+        batch_op.alter_column('created_at',
+               existing_type=sa.DATETIME(),
+               server_default=None)
+
+    with op.batch_alter_table('posting_schedule', schema=None) as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.DATETIME(),
+               server_default=None)
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_status_sched')
+        batch_op.drop_index('ix_posts_status')
+        batch_op.drop_index('ix_posts_created_at')
+        batch_op.drop_index('ix_posts_account_sched_status')
+        batch_op.drop_index('ix_posts_account_created')
+        batch_op.alter_column('updated_at',
+               existing_type=sa.DATETIME(),
+               server_default=None)
+        batch_op.alter_column('created_at',
+               existing_type=sa.DATETIME(),
+               server_default=None)
+        batch_op.alter_column('hashtags',
+               existing_type=sa.JSON(),
+               type_=sa.TEXT(),
+               existing_nullable=True)
+        batch_op.alter_column('media_urls',
+               existing_type=sa.JSON(),
+               type_=sa.TEXT(),
+               existing_nullable=True)
+        batch_op.add_column(sa.Column('post_type', sa.VARCHAR(length=20), nullable=False, server_default='image'))
+        batch_op.add_column(sa.Column('media_files', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('story_elements', sa.JSON(), nullable=True))
+
+    with op.batch_alter_table('accounts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_accounts_is_test'))
+        batch_op.drop_index('ix_accounts_active')
+        batch_op.alter_column('updated_at',
+               existing_type=sa.DATETIME(),
+               server_default=None)
+        batch_op.alter_column('created_at',
+               existing_type=sa.DATETIME(),
+               server_default=None)
+        batch_op.drop_column('is_test')